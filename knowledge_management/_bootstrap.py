@@ -0,0 +1,23 @@
+"""
+Process-wide setup shared by the knowledge_management scripts.
+
+Importing this module (once per process) makes the repository root importable,
+loads the .env file and configures logging if nobody has done it yet.
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Make `knowledge_management` and `browser_use` importable when a script is run directly
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+# Do not clobber variables already set in the environment
+load_dotenv(override=False)
+
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -9,14 +9,13 @@ import asyncio
 import logging
 from pathlib import Path
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Chemins, .env et logging partagés (une seule fois par processus)
+import _bootstrap  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
-# Import des classes
-from main_task_evaluator import TaskEvaluator
-from utils.navigation_graph_manager import NavigationGraphManager
-from utils.guide_generator import GuideGenerator
+# Les classes (et browser_use / les SDK des fournisseurs) sont importées dans chaque exemple,
+# seulement quand il s'exécute
 
 
 async def example_with_anthropic():
@@ -24,19 +23,21 @@ async def example_with_anthropic():
     logger.info("🚀 Exemple avec Anthropic")
     
     try:
-        # Initialiser TaskEvaluator avec Anthropic (par défaut)
-        evaluator = TaskEvaluator(max_attempts=2, llm_provider="anthropic")
+        from main_task_evaluator import TaskEvaluator
         
-        # Exemple de tâche
-        task = "Rechercher un hôtel à Paris sur Booking.com"
-        website_url = "https://www.booking.com"
+        # Initialiser TaskEvaluator avec Anthropic (par défaut)
+        # Le contexte ferme le client HTTP du générateur de guides en sortie
+        async with TaskEvaluator(max_attempts=2, llm_provider="anthropic") as evaluator:
+            # Exemple de tâche
+            task = "Rechercher un hôtel à Paris sur Booking.com"
+            website_url = "https://www.booking.com"
         
-        logger.info(f"📝 Tâche: {task}")
-        logger.info(f"🌐 Site: {website_url}")
+            logger.info(f"📝 Tâche: {task}")
+            logger.info(f"🌐 Site: {website_url}")
         
-        # Exécuter la tâche (commenté pour éviter l'exécution réelle)
-        # results = await evaluator.run_task_with_evaluation(task, website_url)
-        # logger.info(f"✅ Résultats: {results}")
+            # Exécuter la tâche (commenté pour éviter l'exécution réelle)
+            # results = await evaluator.run_task_with_evaluation(task, website_url)
+            # logger.info(f"✅ Résultats: {results}")
         
     except Exception as e:
         logger.error(f"❌ Erreur avec Anthropic: {e}")
@@ -47,19 +48,21 @@ async def example_with_openai():
     logger.info("🚀 Exemple avec OpenAI")
     
     try:
-        # Initialiser TaskEvaluator avec OpenAI
-        evaluator = TaskEvaluator(max_attempts=2, llm_provider="openai")
+        from main_task_evaluator import TaskEvaluator
         
-        # Exemple de tâche
-        task = "Rechercher un vol vers Tokyo sur Expedia"
-        website_url = "https://www.expedia.com"
+        # Initialiser TaskEvaluator avec OpenAI
+        # Le contexte ferme le client HTTP du générateur de guides en sortie
+        async with TaskEvaluator(max_attempts=2, llm_provider="openai") as evaluator:
+            # Exemple de tâche
+            task = "Rechercher un vol vers Tokyo sur Expedia"
+            website_url = "https://www.expedia.com"
         
-        logger.info(f"📝 Tâche: {task}")
-        logger.info(f"🌐 Site: {website_url}")
+            logger.info(f"📝 Tâche: {task}")
+            logger.info(f"🌐 Site: {website_url}")
         
-        # Exécuter la tâche (commenté pour éviter l'exécution réelle)
-        # results = await evaluator.run_task_with_evaluation(task, website_url)
-        # logger.info(f"✅ Résultats: {results}")
+            # Exécuter la tâche (commenté pour éviter l'exécution réelle)
+            # results = await evaluator.run_task_with_evaluation(task, website_url)
+            # logger.info(f"✅ Résultats: {results}")
         
     except Exception as e:
         logger.error(f"❌ Erreur avec OpenAI: {e}")
@@ -70,28 +73,31 @@ async def example_individual_components():
     logger.info("🚀 Exemple des composants individuels")
     
     try:
+        from utils.navigation_graph_manager import NavigationGraphManager
+        from utils.guide_generator import GuideGenerator
+        
         # NavigationGraphManager avec OpenAI
         nav_manager = NavigationGraphManager(llm_provider="openai")
         logger.info("✅ NavigationGraphManager initialisé avec OpenAI")
         
         # GuideGenerator avec Anthropic
-        guide_generator = GuideGenerator(llm_provider="anthropic")
-        logger.info("✅ GuideGenerator initialisé avec Anthropic")
+        async with GuideGenerator(llm_provider="anthropic") as guide_generator:
+            logger.info("✅ GuideGenerator initialisé avec Anthropic")
         
-        # Exemple de génération de guide
-        task = "Se connecter à Gmail"
-        website_url = "https://gmail.com"
+            # Exemple de génération de guide
+            task = "Se connecter à Gmail"
+            website_url = "https://gmail.com"
         
-        guide = await guide_generator.generate_optimized_guide(
-            task=task,
-            website_url=website_url,
-            rag_plans_context="Contexte des plans RAG...",
-            navigation_graph_context="Contexte du graph de navigation...",
-            previous_guide_context="Guide précédent...",
-            attempt_count=1
-        )
+            guide = await guide_generator.generate_optimized_guide(
+                task=task,
+                website_url=website_url,
+                rag_plans_context="Contexte des plans RAG...",
+                navigation_graph_context="Contexte du graph de navigation...",
+                previous_guide_context="Guide précédent...",
+                attempt_count=1
+            )
         
-        logger.info(f"📋 Guide généré: {guide[:100]}...")
+            logger.info(f"📋 Guide généré: {guide[:100]}...")
         
     except Exception as e:
         logger.error(f"❌ Erreur avec les composants individuels: {e}")
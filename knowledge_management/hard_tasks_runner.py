@@ -2,80 +2,169 @@
 
 import asyncio
 import os
-import sys
-import json
-import base64
+import hashlib
 import csv
+import io
 from pathlib import Path
 from typing import List, Dict, Any
 
-# Adjust Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import aiofiles
 
-from dotenv import load_dotenv
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from PIL import Image
+    
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# SIMD base64 codec with the same API as the stdlib module
+try:
+    import pybase64 as base64
+    
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    import base64
+    
+    PYBASE64_AVAILABLE = False
 
-load_dotenv()
+# Shared path, .env and logging setup (runs once per process)
+try:
+    from knowledge_management import _bootstrap  # noqa: F401
+except ImportError:
+    import _bootstrap  # noqa: F401
 
 from browser_use.agent.service import Agent
 from browser_use.browser import BrowserProfile, BrowserSession
-from browser_use.llm import ChatOpenAI, ChatAnthropic
 
-# Set LLM based on defined environment variables
-if os.getenv('OPENAI_API_KEY'):
-    llm = ChatOpenAI(
-        model="gpt-4o",
-#       temperature=0.0
-    )
-#if os.getenv('ANTHROPIC_API_KEY'):
-#    llm = ChatAnthropic(
-#        model="claude-3-5-sonnet-20241022",
-#    )
-else:
+from knowledge_management.utils.json_utils import dumps_json_bytes, write_json_file
+from knowledge_management.utils.shared_browser import close_shared_browser, run_browser_session
+
+def create_llm():
+    """Set LLM based on defined environment variables (only when tasks actually run)"""
+    from browser_use.llm import ChatOpenAI
+    
+    if os.getenv('OPENAI_API_KEY'):
+        return ChatOpenAI(
+            model="gpt-4o",
+#           temperature=0.0
+        )
+    #if os.getenv('ANTHROPIC_API_KEY'):
+    #    from browser_use.llm import ChatAnthropic
+    #    return ChatAnthropic(
+    #        model="claude-3-5-sonnet-20241022",
+    #    )
     raise ValueError('Failed to load OpenAI credentials')
 
 # Configuration
 CSV_FILE = "/Users/twin/Documents/Browser-Use-Graph/browser-use/knowledge_management/datasets/webbench_hitl_final.csv"
 OUTPUT_DIR = "browser-use/knowledge_management/hard_tasks_results"
 MAX_STEPS = 30
+# CSV columns a task is built from
+TASK_COLUMNS = ['ID', 'Starting URL', 'Category', 'Difficulty', 'Task']
+MAX_CONCURRENCY = 4  # Number of tasks running at the same time with SHARED_BROWSER (bounded by LLM rate limits)
+
+# Output directories, resolved once instead of rebuilt for every file
+SCREENSHOTS_DIR = Path(OUTPUT_DIR) / "screenshots"
+RESULTS_DIR = Path(OUTPUT_DIR) / "results"
+HISTORIES_DIR = Path(OUTPUT_DIR) / "histories"
 
 # Create output directories
-Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
-Path(f"{OUTPUT_DIR}/screenshots").mkdir(parents=True, exist_ok=True)
-Path(f"{OUTPUT_DIR}/results").mkdir(parents=True, exist_ok=True)
-Path(f"{OUTPUT_DIR}/histories").mkdir(parents=True, exist_ok=True)
+for output_subdir in (SCREENSHOTS_DIR, RESULTS_DIR, HISTORIES_DIR):
+    output_subdir.mkdir(parents=True, exist_ok=True)
 
-browser_session = BrowserSession(
-    browser_profile=BrowserProfile(
-        headless=False,  # Set to True in production
-        minimum_wait_page_load_time=3,
-        maximum_wait_page_load_time=10,
-        viewport={'width': 1280, 'height': 1100},
-        user_data_dir='~/.config/browseruse/profiles/default',
-    )
+# Browser profile used by every task
+browser_profile = BrowserProfile(
+    headless=False,  # Set to True in production
+    minimum_wait_page_load_time=3,
+    maximum_wait_page_load_time=10,
+    viewport={'width': 1280, 'height': 1100},
+    user_data_dir='~/.config/browseruse/profiles/default',
 )
 
+# Opt-in: run every task in its own incognito BrowserContext of one shared Chromium, MAX_CONCURRENCY at a time.
+# Those contexts do not see the cookies and logins saved in the user_data_dir profile above, so by default
+# all tasks share one persistent-profile session instead and run one after the other.
+SHARED_BROWSER = os.getenv('HARD_TASKS_SHARED_BROWSER', '').lower() in ('1', 'true', 'yes')
+
+def _load_hard_tasks_pyarrow() -> List[Dict[str, Any]]:
+    """Load hard tasks with pyarrow: parsing and filtering run in C++ instead of a Python row loop"""
+    # Every column is read as text: type inference would turn IDs such as "001" into the integer 1.
+    # Quoted task descriptions may span several lines, as the csv module allows.
+    table = pacsv.read_csv(
+        CSV_FILE,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={column: pa.string() for column in TASK_COLUMNS},
+            include_columns=TASK_COLUMNS,
+        ),
+    )
+    total_tasks = table.num_rows
+    
+    table = table.filter(pc.equal(table['Difficulty'], 'hard'))
+    hard_tasks_count = table.num_rows
+    
+    # Only keep "Log in" tasks
+    table = table.filter(pc.starts_with(table['Task'], 'Log in'))
+    
+    tasks = [
+        {
+            'id': row['ID'],
+            'starting_url': row['Starting URL'],
+            'category': row['Category'],
+            'difficulty': row['Difficulty'],
+            'task_description': row['Task']
+        }
+        for row in table.to_pylist()
+    ]
+    
+    print(f"Found {hard_tasks_count} hard tasks out of {total_tasks} total tasks")
+    return tasks
+
 def load_hard_tasks() -> List[Dict[str, Any]]:
     """Load hard tasks from the CSV file"""
+    if PYARROW_AVAILABLE:
+        try:
+            return _load_hard_tasks_pyarrow()
+        except Exception as e:
+            print(f"pyarrow could not load the CSV file ({e}), falling back to the csv module")
+    
     try:
         tasks = []
         total_tasks = 0
         hard_tasks_count = 0
         
-        with open(CSV_FILE, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        with open(CSV_FILE, 'r', encoding='utf-8', newline='') as file:
+            # Plain csv.reader with column indices: no dict is built for rows that get filtered out
+            reader = csv.reader(file)
+            header = next(reader)
+            id_idx = header.index('ID')
+            url_idx = header.index('Starting URL')
+            category_idx = header.index('Category')
+            difficulty_idx = header.index('Difficulty')
+            task_idx = header.index('Task')
+            
             for row in reader:
                 total_tasks += 1
-                if row['Difficulty'] == 'hard':
+                if row[difficulty_idx] == 'hard':
                     hard_tasks_count += 1
                     # if task does not start with "Log in" stop
-                    if not row['Task'].startswith("Log in"):
+                    if not row[task_idx].startswith("Log in"):
                         continue
                     task = {
-                        'id': str(row['ID']),
-                        'starting_url': row['Starting URL'],
-                        'category': row['Category'],
-                        'difficulty': row['Difficulty'],
-                        'task_description': row['Task']
+                        'id': row[id_idx],
+                        'starting_url': row[url_idx],
+                        'category': row[category_idx],
+                        'difficulty': row[difficulty_idx],
+                        'task_description': row[task_idx]
                     }
                     tasks.append(task)
         
@@ -86,33 +175,78 @@ def load_hard_tasks() -> List[Dict[str, Any]]:
         print(f"Error loading CSV file: {e}")
         return []
 
-def save_screenshots(history, task_id: str) -> List[str]:
-    """Save screenshots from history and return list of saved file paths"""
+# Base64 characters decoded per write, must be a multiple of 4
+SCREENSHOT_CHUNK_SIZE = 1 << 16
+# Screenshots are saved as the original step_N.png by default. Opt-in: HARD_TASKS_WEBP_QUALITY=70 (any 1-100 quality)
+# re-encodes them as several times smaller step_N.webp files instead (needs Pillow, and readers must expect .webp)
+SCREENSHOT_WEBP_QUALITY = int(os.environ['HARD_TASKS_WEBP_QUALITY']) if os.getenv('HARD_TASKS_WEBP_QUALITY') else None
+
+def write_base64_to_file(screenshot_base64: str, filepath: str):
+    """Decode base64 chunk by chunk straight into the file, never holding the full decoded image"""
+    with open(filepath, 'wb') as f:
+        for start in range(0, len(screenshot_base64), SCREENSHOT_CHUNK_SIZE):
+            f.write(base64.b64decode(screenshot_base64[start:start + SCREENSHOT_CHUNK_SIZE]))
+
+def write_base64_to_webp(screenshot_base64: str, filepath: str) -> str:
+    """Re-encode a base64 PNG screenshot to WebP, several times smaller for UI screenshots"""
+    webp_filepath = os.path.splitext(filepath)[0] + '.webp'
+    with Image.open(io.BytesIO(base64.b64decode(screenshot_base64))) as image:
+        image.save(webp_filepath, 'WEBP', quality=SCREENSHOT_WEBP_QUALITY, method=4)
+    return webp_filepath
+
+def screenshot_digest(screenshot_base64: str) -> bytes:
+    """Content hash of a screenshot (hashing the base64 text avoids decoding it)"""
+    return hashlib.blake2b(screenshot_base64.encode('ascii'), digest_size=8).digest()
+
+async def save_screenshots(history, task_id: str) -> List[str]:
+    """Save screenshots from history and return list of saved file paths
+    
+    Frames identical to an earlier one are not written again, they are listed in manifest.json instead.
+    """
     saved_files = []
+    seen: Dict[bytes, str] = {}
+    aliases = []
     
     # Create task-specific screenshots directory
-    task_screenshots_dir = Path(f"{OUTPUT_DIR}/screenshots/{task_id}")
+    task_screenshots_dir = SCREENSHOTS_DIR / task_id
     task_screenshots_dir.mkdir(parents=True, exist_ok=True)
     
+    # Plain string paths, no Path object built per frame
+    screenshots_prefix = f"{task_screenshots_dir}/"
+    
     for i, history_item in enumerate(history.history):
         if history_item.state and history_item.state.screenshot:
             # Create filename
             filename = f"step_{i}.png"
-            filepath = task_screenshots_dir / filename
+            filepath = screenshots_prefix + filename
             
             try:
-                # Decode base64 and save
-                screenshot_data = base64.b64decode(history_item.state.screenshot)
-                with open(filepath, 'wb') as f:
-                    f.write(screenshot_data)
-                saved_files.append(str(filepath))
-                print(f"  📸 Saved screenshot: {filename}")
+                # Skip frames already saved (e.g. the page did not change between steps)
+                digest = await asyncio.to_thread(screenshot_digest, history_item.state.screenshot)
+                if digest in seen:
+                    aliases.append({'step': i, 'alias_of': os.path.basename(seen[digest])})
+                    continue
+                
+                # Decode and save off the event loop
+                if PIL_AVAILABLE and SCREENSHOT_WEBP_QUALITY is not None:
+                    filepath = await asyncio.to_thread(write_base64_to_webp, history_item.state.screenshot, filepath)
+                else:
+                    await asyncio.to_thread(write_base64_to_file, history_item.state.screenshot, filepath)
+                seen[digest] = filepath
+                saved_files.append(filepath)
+                print(f"  📸 Saved screenshot: {os.path.basename(filepath)}")
             except Exception as e:
                 print(f"  ❌ Error saving screenshot {filename}: {e}")
     
+    if aliases:
+        manifest_json = dumps_json_bytes({'duplicates': aliases})
+        async with aiofiles.open(f"{screenshots_prefix}manifest.json", 'wb') as f:
+            await f.write(manifest_json)
+        print(f"  🔁 Skipped {len(aliases)} duplicate screenshots (see manifest.json)")
+    
     return saved_files
 
-def save_final_results(history, task_id: str):
+async def save_final_results(history, task_id: str):
     """Save final result and completion status"""
     try:
         # Get final result
@@ -120,12 +254,12 @@ def save_final_results(history, task_id: str):
         is_done = history.is_done()
         
         # Save final result
-        result_file = Path(f"{OUTPUT_DIR}/results/{task_id}_final_result.txt")
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(str(final_result) if final_result else "No final result")
+        result_file = RESULTS_DIR / f"{task_id}_final_result.txt"
+        async with aiofiles.open(result_file, 'w', encoding='utf-8') as f:
+            await f.write(str(final_result) if final_result else "No final result")
         
         # Save completion status
-        status_file = Path(f"{OUTPUT_DIR}/results/{task_id}_completion_status.json")
+        status_file = RESULTS_DIR / f"{task_id}_completion_status.json"
         status_data = {
             'task_id': task_id,
             'is_done': is_done,
@@ -135,15 +269,16 @@ def save_final_results(history, task_id: str):
             'errors': history.errors()
         }
         
-        with open(status_file, 'w', encoding='utf-8') as f:
-            json.dump(status_data, f, indent=2, ensure_ascii=False)
+        status_json = await asyncio.to_thread(dumps_json_bytes, status_data)
+        async with aiofiles.open(status_file, 'wb') as f:
+            await f.write(status_json)
         
         print(f"  💾 Saved final result and completion status")
         
     except Exception as e:
         print(f"  ❌ Error saving final results: {e}")
 
-async def execute_task(task: Dict[str, Any]) -> Dict[str, Any]:
+async def execute_task(task: Dict[str, Any], llm) -> Dict[str, Any]:
     """Execute a single task with Browser Use"""
     task_id = task['id']
     task_description = task['task_description']
@@ -155,41 +290,42 @@ async def execute_task(task: Dict[str, Any]) -> Dict[str, Any]:
     print(f"   Task: {task_description[:100]}...")
     
     try:
-        # Create agent
-        agent = Agent(
-            task=task_description,
-            llm=llm,
-            browser_session=browser_session,
-            validate_output=True,
-            enable_memory=False,
-        )
+        async with run_browser_session(browser_profile, isolated=SHARED_BROWSER) as browser_session:
+            # Create agent
+            agent = Agent(
+                task=task_description,
+                llm=llm,
+                browser_session=browser_session,
+                validate_output=True,
+                enable_memory=False,
+            )
         
-        # Execute task
-        history = await agent.run(max_steps=MAX_STEPS)
+            # Execute task
+            history = await agent.run(max_steps=MAX_STEPS)
         
-        # Save history
-        history_file = Path(f"{OUTPUT_DIR}/histories/{task_id}_history.json")
-        history.save_to_file(str(history_file))
-        print(f"  📄 Saved history to: {history_file}")
+            # Save history
+            history_file = HISTORIES_DIR / f"{task_id}_history.json"
+            await asyncio.to_thread(history.save_to_file, str(history_file))
+            print(f"  📄 Saved history to: {history_file}")
         
-        # Save screenshots
-        screenshots = save_screenshots(history, task_id)
+            # Save screenshots
+            screenshots = await save_screenshots(history, task_id)
         
-        # Save final results
-        save_final_results(history, task_id)
+            # Save final results
+            await save_final_results(history, task_id)
         
-        # Return execution summary
-        return {
-            'task_id': task_id,
-            'success': True,
-            'total_steps': len(history.history),
-            'is_done': history.is_done(),
-            'is_successful': history.is_successful(),
-            'has_errors': history.has_errors(),
-            'screenshots_count': len(screenshots),
-            'final_result': history.final_result(),
-            'error': None
-        }
+            # Return execution summary
+            return {
+                'task_id': task_id,
+                'success': True,
+                'total_steps': len(history.history),
+                'is_done': history.is_done(),
+                'is_successful': history.is_successful(),
+                'has_errors': history.has_errors(),
+                'screenshots_count': len(screenshots),
+                'final_result': history.final_result(),
+                'error': None
+            }
         
     except Exception as e:
         print(f"  ❌ Error executing task {task_id}: {e}")
@@ -208,7 +344,7 @@ async def execute_task(task: Dict[str, Any]) -> Dict[str, Any]:
 async def main():
     """Main function to execute all hard tasks"""
     print("🔍 Loading hard tasks from CSV...")
-    tasks = load_hard_tasks()
+    tasks = await asyncio.to_thread(load_hard_tasks)
     
     if not tasks:
         print("❌ No hard tasks found or error loading CSV")
@@ -216,34 +352,47 @@ async def main():
     
     print(f"📋 Found {len(tasks)} hard tasks to execute")
     
-    # Execute tasks
-    results = []
-    for i, task in enumerate(tasks, 1):
-        print(f"\n{'='*80}")
-        print(f"Task {i}/{len(tasks)}")
-        print(f"{'='*80}")
-        
-        result = await execute_task(task)
-        results.append(result)
-        
-        # Small delay between tasks
-        await asyncio.sleep(2)
+    llm = create_llm()
+    
+    # With SHARED_BROWSER tasks run concurrently, at most MAX_CONCURRENCY at a time;
+    # otherwise they share the persistent-profile page and must run one at a time
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY if SHARED_BROWSER else 1)
+    
+    async def bounded_execute_task(i: int, task: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            print(f"\n{'='*80}")
+            print(f"Task {i}/{len(tasks)}")
+            print(f"{'='*80}")
+            return await execute_task(task, llm)
+    
+    try:
+        results = await asyncio.gather(*(bounded_execute_task(i, task) for i, task in enumerate(tasks, 1)))
+    finally:
+        await close_shared_browser()
     
     # Save overall results summary
     summary_file = Path(f"{OUTPUT_DIR}/execution_summary.json")
+    # Aggregate all metrics in a single pass over the results
+    successful_tasks = completed_tasks = successful_completions = tasks_with_errors = total_screenshots = 0
+    for r in results:
+        successful_tasks += bool(r['success'])
+        completed_tasks += bool(r['is_done'])
+        successful_completions += bool(r['is_successful'])
+        tasks_with_errors += bool(r['has_errors'])
+        total_screenshots += r['screenshots_count']
+    
     summary = {
         'total_tasks': len(tasks),
-        'successful_tasks': len([r for r in results if r['success']]),
-        'failed_tasks': len([r for r in results if not r['success']]),
-        'completed_tasks': len([r for r in results if r['is_done']]),
-        'successful_completions': len([r for r in results if r['is_successful']]),
-        'tasks_with_errors': len([r for r in results if r['has_errors']]),
-        'total_screenshots': sum([r['screenshots_count'] for r in results]),
+        'successful_tasks': successful_tasks,
+        'failed_tasks': len(results) - successful_tasks,
+        'completed_tasks': completed_tasks,
+        'successful_completions': successful_completions,
+        'tasks_with_errors': tasks_with_errors,
+        'total_screenshots': total_screenshots,
         'task_results': results
     }
     
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    write_json_file(summary, summary_file)
     
     print(f"\n{'='*80}")
     print("📊 EXECUTION SUMMARY")
@@ -9,47 +9,75 @@ This script:
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
-import sys
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, Literal
+from typing import List, Optional, Tuple, Literal
 from urllib.parse import urlparse
 
-# Add project path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from dotenv import load_dotenv
+# Shared path, .env and logging setup (runs once per process)
+try:
+    from knowledge_management import _bootstrap  # noqa: F401
+except ImportError:
+    import _bootstrap  # noqa: F401
 
 # Browser-Use imports
 from browser_use.agent.service import Agent
-from browser_use.browser import BrowserProfile, BrowserSession
+from browser_use.agent.views import AgentHistoryList
+from browser_use.browser import BrowserProfile
 from browser_use.llm import ChatAnthropic, ChatOpenAI
-from browser_use.llm.messages import UserMessage
+from browser_use.llm.exceptions import ModelProviderError, ModelRateLimitError
+from browser_use.llm.messages import BaseMessage, SystemMessage, UserMessage
+from browser_use.llm.views import ChatInvokeCompletion
+from browser_use.utils import retry
 
 # Local imports
-from knowledge_management.utils.history_parser import load_history_from_file, history_to_llm_messages, save_all_screenshots
+from knowledge_management.utils.json_utils import read_json_file, write_json_file
+from knowledge_management.utils.history_parser import history_to_llm_messages, save_all_screenshots, save_history_ndjson
 from knowledge_management.utils.llm_response_parser import parse_llm_evaluation_response, ParsedLLMResponse
-from knowledge_management.utils.plan_rag_manager import PlanRAGManager
-from knowledge_management.utils.navigation_graph_manager import NavigationGraphManager
-from knowledge_management.utils.guide_generator import GuideGenerator
-from knowledge_management.prompts.eval_generation_prompts import SYSTEM_PROMPT_EVAL
+from knowledge_management.utils.plan_rag_manager import get_plan_rag_manager
+from knowledge_management.utils.navigation_graph_manager import MAX_GRAPH_CONTEXT_CHARS, NO_NAVIGATION_CONTEXT, get_navigation_graph_manager
+from knowledge_management.utils.guide_generator import GuideGenerator, NO_RAG_PLANS_CONTEXT
+from knowledge_management.utils.shared_browser import close_shared_browser, run_browser_session
+from knowledge_management.prompts import eval_generation_prompts
 
-# Logging configuration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Maximum number of evaluator LLM calls in flight at once (keeps us under provider rate limits)
+MAX_CONCURRENT_EVALUATIONS = 8
+
+browser_profile = BrowserProfile(
+    headless=False,  # True in production
+    minimum_wait_page_load_time=3,
+    maximum_wait_page_load_time=10,
+    viewport={'width': 1280, 'height': 1100},
+    user_data_dir='~/.config/browseruse/profiles/default',
+)
+
+# Opt-in: run every attempt in its own incognito BrowserContext of one shared Chromium. Those contexts do not
+# see the cookies and logins saved in the user_data_dir profile above (needed by login tasks), so by default
+# attempts reuse one persistent-profile session; they never overlap (a speculative run starts once the
+# previous run has finished).
+SHARED_BROWSER = os.getenv('EVALUATOR_SHARED_BROWSER', '').lower() in ('1', 'true', 'yes')
+
+
+class ServerSideProviderError(ModelProviderError):
+    """5xx error of the evaluator LLM provider, worth retrying"""
 
 
 class TaskEvaluator:
     """Main class for task evaluation and improvement"""
     
-    def __init__(self, max_attempts: int = 3, llm_provider: Literal["anthropic", "openai"] = "anthropic"):
+    def __init__(self, max_attempts: int = 3, llm_provider: Literal["anthropic", "openai"] = "anthropic",
+                 speculative_retries: bool = False):
         self.max_attempts = max_attempts
+        # Start the next attempt (with the current guide) while the evaluator scores this one;
+        # it is dropped when the evaluation produces a new failure guide, so it only saves time on repeat retries
+        self.speculative_retries = speculative_retries
         self.llm_provider = llm_provider
         
         # Vérifier que la clé API appropriée est définie
@@ -64,17 +92,6 @@ class TaskEvaluator:
         else:
             raise ValueError(f"Fournisseur LLM non reconnu: {llm_provider}")
         
-        # Initialize Browser-Use
-        self.browser_session = BrowserSession(
-            browser_profile=BrowserProfile(
-                headless=False,  # True in production
-                minimum_wait_page_load_time=3,
-                maximum_wait_page_load_time=10,
-                viewport={'width': 1280, 'height': 1100},
-                user_data_dir='~/.config/browseruse/profiles/default',
-            )
-        )
-        
         # Initialize LLM for Browser-Use
         if llm_provider == "anthropic":
             self.browser_llm = ChatAnthropic(
@@ -113,16 +130,29 @@ class TaskEvaluator:
         self.screenshots_dir.mkdir(exist_ok=True)
         self.tmp_dir.mkdir(exist_ok=True)
         
-        self.rag_manager = PlanRAGManager() # Initialize RAG manager for plans
-        self.nav_manager = NavigationGraphManager(llm_provider=llm_provider) # Initialize navigation graph manager
+        # Index of successful plans keyed by (task, website_url), persisted next to the plans
+        self.plans_index_file = self.plans_dir / "index.json"
+        self._plans_index: Optional[dict] = None
+        self._plans_index_lock = asyncio.Lock()
+        
+        self.rag_manager = get_plan_rag_manager() # Shared RAG manager for plans
+        self.nav_manager = get_navigation_graph_manager(llm_provider) # Shared navigation graph manager
         self.guide_generator = GuideGenerator(llm_provider=llm_provider) # Initialize optimized guide generator
         
+        # Formatted RAG / navigation contexts, reused across retries and cleared when plans or graphs are saved
+        self._rag_context_cache = lru_cache(maxsize=256)(self._fetch_rag_plans_context)
+        self._nav_context_cache = lru_cache(maxsize=256)(self._fetch_navigation_graph_context)
+        
+        # Throttle concurrent evaluator calls when several tasks run in parallel
+        self._evaluator_semaphore = asyncio.Semaphore(MAX_CONCURRENT_EVALUATIONS)
+        
         logger.info(f"🎯 TaskEvaluator initialisé avec {llm_provider}")
     
     def _generate_task_id(self, task: str) -> str:
         """Generate a unique ID for the task"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        task_hash = hash(task) % 10000
+        # Stable across processes, unlike hash() which is salted by PYTHONHASHSEED
+        task_hash = hashlib.blake2b(task.encode('utf-8'), digest_size=3).hexdigest()
         return f"task_{timestamp}_{task_hash}"
     
     async def _save_navigation_graph(self, navigation_graph: dict, website_url: str = None):
@@ -132,12 +162,14 @@ class TaskEvaluator:
         try:
             # Use NavigationGraphManager to save
             success = await self.nav_manager.save_navigation_graph(navigation_graph, website_url)
+            # A new or merged graph changes the navigation context of its website
+            self._nav_context_cache.cache_clear()
             if not success:
                 logger.warning("⚠️ Failed to save navigation graph")
         except Exception as e:
             logger.error(f"❌ Error saving navigation graph: {e}")
     
-    def _save_plans(self, task_id: str, guide: dict):
+    async def _save_plans(self, task_id: str, guide: dict):
         """
         Save successful plan (now a dictionary of guides)
         
@@ -159,13 +191,66 @@ class TaskEvaluator:
         
         logger.info(f"✅ Successful plan saved: {filepath}")
         
-        # Save each guide in RAG system
-        success = self.rag_manager.store_successful_plan(guide, task_id)
+        # Save each guide in RAG system, embedding in a worker thread so the event loop keeps running
+        success = await asyncio.to_thread(self.rag_manager.store_successful_plan, guide, task_id)
+        self._rag_context_cache.cache_clear()
         if success:
             logger.info(f"💾 All guides stored in RAG system")
         else:
             logger.warning(f"⚠️ Failed to store some guides in RAG")
     
+    def _plan_cache_key(self, task: str, website_url: str) -> str:
+        """Stable key for a (task, website_url) pair, insensitive to case and whitespace"""
+        normalized_task = ' '.join(task.lower().split())
+        return hashlib.blake2b(f"{normalized_task}||{website_url}".encode('utf-8'), digest_size=8).hexdigest()
+    
+    def _load_plans_index(self) -> dict:
+        """Load the successful plans index from disk (once per evaluator)"""
+        if self._plans_index is None:
+            try:
+                self._plans_index = read_json_file(self.plans_index_file)
+            except FileNotFoundError:
+                self._plans_index = {}
+            except Exception as e:
+                logger.warning(f"⚠️ Error loading plans index, starting from scratch: {e}")
+                self._plans_index = {}
+        return self._plans_index
+    
+    def _get_cached_plan(self, task: str, website_url: str) -> Optional[str]:
+        """
+        Get the successful plan stored by a previous run of the same task
+        
+        Args:
+            task: The task to execute
+            website_url: The website URL where the task should be executed
+            
+        Returns:
+            Content of the stored plan, or None if the task never succeeded before
+        """
+        entry = self._load_plans_index().get(self._plan_cache_key(task, website_url))
+        if not entry:
+            return None
+        
+        try:
+            with open(self.plans_dir / entry['plan_file'], 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.warning(f"⚠️ Error reading cached plan {entry['plan_file']}: {e}")
+            return None
+    
+    async def _record_successful_plan(self, task: str, website_url: str, task_id: str):
+        """Record a successful plan in the index (written atomically)"""
+        async with self._plans_index_lock:
+            index = self._load_plans_index()
+            index[self._plan_cache_key(task, website_url)] = {
+                'plan_file': f"{task_id}_successful_plan.txt",
+                'timestamp': datetime.now().isoformat()
+            }
+            
+            tmp_file = self.plans_index_file.with_suffix('.json.tmp')
+            write_json_file(index, tmp_file)
+            os.replace(tmp_file, self.plans_index_file)
+    
     def _get_rag_plans_context(self, task_title: Optional[str]) -> str:
         """
         Get RAG plans context for a given task title
@@ -181,17 +266,21 @@ class TaskEvaluator:
             return "No task title available for RAG search."
         
         try:
-            similar_plans = self.rag_manager.find_similar_plans(task_title, top_k=10)
-            if similar_plans:
-                logger.info(f"🔍 Found {len(similar_plans)} similar plans")
-                return self.rag_manager.build_context_from_similar_plans(similar_plans)
-            else:
-                logger.warning("⚠️ No similar successful plans found in RAG database.")
-                return "No similar successful plans found in RAG database."
+            return self._rag_context_cache(task_title.lower().strip())
         except Exception as e:
             logger.warning(f"⚠️ Error retrieving RAG plans: {e}")
             return "Error retrieving RAG plans."
     
+    def _fetch_rag_plans_context(self, task_title: str) -> str:
+        """Search similar plans and format them (cached per normalized task title, errors are not cached)"""
+        similar_plans = self.rag_manager.find_similar_plans(task_title, top_k=10)
+        if similar_plans:
+            logger.info(f"🔍 Found {len(similar_plans)} similar plans")
+            return self.rag_manager.build_context_from_similar_plans(similar_plans)
+        else:
+            logger.warning("⚠️ No similar successful plans found in RAG database.")
+            return NO_RAG_PLANS_CONTEXT
+    
     def _get_navigation_graph_context(self, website_url: str) -> str:
         """
         Get navigation graph context for a given website
@@ -203,15 +292,22 @@ class TaskEvaluator:
             Formatted context from navigation graphs
         """
         try:
-            graphs = self.nav_manager.find_navigation_graphs_for_website(website_url)
-            if graphs:
-                return self.nav_manager.build_navigation_context(graphs, max_graphs=3)
-            else:
-                return "No previous navigation patterns available for this website."
+            return self._nav_context_cache(website_url)
         except Exception as e:
             logger.warning(f"⚠️ Error retrieving navigation graphs: {e}")
             return "Error retrieving navigation patterns."
     
+    def _fetch_navigation_graph_context(self, website_url: str) -> str:
+        """Find the website's navigation graphs and format them (cached per URL, errors are not cached)"""
+        # Only the part of each graph that fits in the context is read from disk
+        graphs = self.nav_manager.find_navigation_graphs_for_website(
+            website_url, max_content_chars=MAX_GRAPH_CONTEXT_CHARS
+        )
+        if graphs:
+            return self.nav_manager.build_navigation_context(graphs, max_graphs=3)
+        else:
+            return NO_NAVIGATION_CONTEXT
+    
     def _build_failure_recommendations_context(self, verdict: str, failure_guide: str) -> str:
         """
         Build context from failure recommendations
@@ -233,24 +329,33 @@ class TaskEvaluator:
 
 Use this information to understand what was tried before and avoid repeating unsuccessful approaches."""
     
-    async def _evaluate_task_execution(self, history_file: str, task: str, report: str) -> ParsedLLMResponse:
+    @retry(wait=2, retries=4, timeout=300, backoff_factor=2, retry_on=(ModelRateLimitError, ServerSideProviderError))
+    async def _invoke_evaluator(self, messages: List[BaseMessage]) -> ChatInvokeCompletion:
+        """Call the evaluator LLM, retrying rate limits and 5xx provider errors with exponential backoff"""
+        try:
+            return await self.evaluator_llm.ainvoke(messages)
+        except ModelRateLimitError:
+            raise
+        except ModelProviderError as e:
+            # Client errors (auth, invalid request...) fail the same way on every attempt: raised as-is
+            status_code = e.args[1] if len(e.args) > 1 else None
+            if isinstance(status_code, int) and status_code >= 500:
+                raise ServerSideProviderError(str(e.args[0]), status_code, e.model) from e
+            raise
+    
+    async def _evaluate_task_execution(self, history_data: dict, task: str, report: str) -> ParsedLLMResponse:
         """Evaluate task execution with evaluator LLM"""
         try:
-            # Load history
-            history_data = load_history_from_file(history_file)
-            
             # Convert to LLM messages
             llm_messages = history_to_llm_messages(history_data)
             
-            # Create system message with task
-            from browser_use.llm.messages import SystemMessage
-            enhanced_system_prompt = f"""{SYSTEM_PROMPT_EVAL}
-
-## The user try to reach this goal:
+            # Cached prefix: the static system prompt (shared by every task) followed by the goal
+            # (shared by every attempt of this task); only the trajectory after it changes per attempt
+            system_message = SystemMessage(content=eval_generation_prompts.SYSTEM_PROMPT_EVAL, cache=True)
+            goal_message = UserMessage(content=f"""## The user try to reach this goal:
 {task}
 
-Please evaluate the user trajectory for this goal."""
-            system_message = SystemMessage(content=enhanced_system_prompt)
+Please evaluate the user trajectory for this goal.""", cache=True)
 
             # Create user message with verdict
             if report:
@@ -259,11 +364,18 @@ Please evaluate the user trajectory for this goal."""
                 user_message = UserMessage(content=verdict_message)
                 llm_messages.append(user_message)
             
-            all_messages = [system_message] + llm_messages
+            all_messages = [system_message, goal_message] + llm_messages
             
             # Send to evaluator LLM
             logger.info("🔍 Evaluation in progress...")
-            response = await self.evaluator_llm.ainvoke(all_messages)
+            async with self._evaluator_semaphore:
+                response = await self._invoke_evaluator(all_messages)
+            
+            if response.usage:
+                logger.debug(
+                    f"🗄️ Evaluator prompt tokens: {response.usage.prompt_tokens} "
+                    f"(cache read: {response.usage.prompt_cached_tokens}, cache write: {response.usage.prompt_cache_creation_tokens})"
+                )
             
             # Parse response
             parsed_response = parse_llm_evaluation_response(response.completion)
@@ -275,47 +387,46 @@ Please evaluate the user trajectory for this goal."""
             logger.error(f"❌ Error during evaluation: {e}")
             raise
     
-    async def _execute_task(self, task: str, enhanced_prompt: Optional[str] = None) -> Tuple[str, str]:
+    async def _execute_task(self, task: str, enhanced_prompt: Optional[str] = None) -> Tuple[AgentHistoryList, str]:
         """Execute a task with Browser-Use"""
         try:
-            # Create agent with custom message context if provided
-            agent_kwargs = {
-                'task': task,
-                'llm': self.browser_llm,
-                'browser_session': self.browser_session,
-                'validate_output': True,
-                'enable_memory': False,
-            }
-            
-            if enhanced_prompt:
-                agent_kwargs['message_context'] = enhanced_prompt
-            
-            agent = Agent(**agent_kwargs)
-            
-            # Execute task
-            logger.info("🚀 Executing task...")
-            history = await agent.run(max_steps=25)
+            # Persistent-profile session, or with SHARED_BROWSER a new context closed when the run ends or is cancelled
+            async with run_browser_session(browser_profile, isolated=SHARED_BROWSER) as browser_session:
+                # Create agent with custom message context if provided
+                agent_kwargs = {
+                    'task': task,
+                    'llm': self.browser_llm,
+                    'browser_session': browser_session,
+                    'validate_output': True,
+                    'enable_memory': False,
+                }
+                
+                if enhanced_prompt:
+                    agent_kwargs['message_context'] = enhanced_prompt
+                
+                agent = Agent(**agent_kwargs)
+                
+                # Execute task
+                logger.info("🚀 Executing task...")
+                history = await agent.run(max_steps=25)
 
             logger.info(f"History final result: {history.final_result()}")
             logger.info(f"History is_done: {history.is_done()}")
             
-            # Save history
-            history_file = self.tmp_dir / "history.json"
-            history.save_to_file(str(history_file))
-            
-            return str(history_file), history.final_result()
+            return history, history.final_result()
             
         except Exception as e:
             logger.error(f"❌ Error during task execution: {e}")
             raise
     
-    async def run_task_with_evaluation(self, task: str, website_url: str) -> dict:
+    async def run_task_with_evaluation(self, task: str, website_url: str, force_rerun: bool = False) -> dict:
         """
         Execute a task with evaluation and iterative improvement
         
         Args:
             task: The task to execute
             website_url: The website URL where the task should be executed
+            force_rerun: Ignore any successful plan stored by a previous run of this task
             
         Returns:
             dict: Execution results
@@ -341,53 +452,86 @@ Please evaluate the user trajectory for this goal."""
         
         optimized_guide = None # Initialize empty optimized guide
         
+        # Reuse the plan of a previous successful run of this task on the first attempt
+        cached_plan = None if force_rerun else self._get_cached_plan(task, website_url)
+        if cached_plan:
+            logger.info("♻️ Successful plan found from a previous run, reusing it")
+        
+        message_context = None
+        pending_run: Optional[asyncio.Task] = None
+        history_saves: List[asyncio.Task] = []
+        
         for attempt in range(1, self.max_attempts + 1):
             logger.info(f"\n🔄 Attempt {attempt}/{self.max_attempts}")
             
             try:
 
-                # Subsequent attempts: use context from previous failed attempt
-                logger.info("🎯 Generating optimized guide based on previous attempt context...")
-                
-                # Get contexts for subsequent attempts
-                rag_context = self._get_rag_plans_context(current_task_title)
-                nav_context = self._get_navigation_graph_context(current_website_url)
-                
-                # Build failure context
-                failure_context = ""
-                if current_verdict and current_failure_guide:
-                    failure_context = self._build_failure_recommendations_context(current_verdict, current_failure_guide)
-                
-                optimized_guide = await self.guide_generator.generate_optimized_guide(
-                    task=task,
-                    website_url=current_website_url,
-                    rag_plans_context=rag_context,
-                    navigation_graph_context=nav_context,
-                    previous_guide_context=failure_context,
-                    attempt_count=attempt - 1
-                )
-                
-                logger.info(f"🎯 Optimized guide generated: {optimized_guide}")
-                # Build message context with optimized guide
-                message_context = None
-                if optimized_guide:
-                    message_context = f"""## An external evaluator would like you to try this approach that could be helpful for the task:
+                if pending_run is not None:
+                    # Speculative run started during the previous evaluation, with the previous guide
+                    run, pending_run = pending_run, None
+                    history, report = await run
+                else:
+                    if attempt == 1 and cached_plan:
+                        optimized_guide = cached_plan
+                    else:
+                        # Subsequent attempts: use context from previous failed attempt
+                        logger.info("🎯 Generating optimized guide based on previous attempt context...")
+                    
+                        # Get contexts for subsequent attempts (vector search and graph lookup run concurrently)
+                        rag_context, nav_context = await asyncio.gather(
+                            asyncio.to_thread(self._get_rag_plans_context, current_task_title),
+                            asyncio.to_thread(self._get_navigation_graph_context, current_website_url),
+                        )
+                    
+                        # Build failure context
+                        failure_context = ""
+                        if current_verdict and current_failure_guide:
+                            failure_context = self._build_failure_recommendations_context(current_verdict, current_failure_guide)
+                    
+                        optimized_guide = await self.guide_generator.generate_optimized_guide(
+                            task=task,
+                            website_url=current_website_url,
+                            rag_plans_context=rag_context,
+                            navigation_graph_context=nav_context,
+                            previous_guide_context=failure_context,
+                            attempt_count=attempt - 1
+                        )
+                    
+                        logger.info(f"🎯 Optimized guide generated: {optimized_guide}")
+                    # Build message context with optimized guide
+                    message_context = None
+                    if optimized_guide:
+                        message_context = f"""## An external evaluator would like you to try this approach that could be helpful for the task:
 
 {optimized_guide}
 
 Follow this guide to complete the task efficiently and avoid common pitfalls."""
                 
-                # Execute task
-                history_file, report = await self._execute_task(task, message_context)
+                    # Execute task
+                    history, report = await self._execute_task(task, message_context)
+                
+                # Serialize history once in memory, shared by evaluation and screenshots
+                history_data = history.model_dump()
+                del history
+                
+                # Save history for debugging (one step per line) while the evaluation runs on the in-memory
+                # history; the write is awaited before returning
+                history_file = self.tmp_dir / f"{task_id}_history.ndjson"
+                history_saves.append(asyncio.create_task(asyncio.to_thread(save_history_ndjson, history_data, str(history_file))))
+                
+                # Overlap the evaluator call with the next attempt, run with the current guide (depth 1, cancelled
+                # on SUCCESS/IMPOSSIBLE and when the evaluation brings a new failure guide)
+                if self.speculative_retries and attempt < self.max_attempts:
+                    pending_run = asyncio.create_task(self._execute_task(task, message_context))
                 
                 # Evaluate result
-                evaluation = await self._evaluate_task_execution(history_file, task, report)
+                evaluation = await self._evaluate_task_execution(history_data, task, report)
                 
                 # Save navigation graph with aggregation
                 await self._save_navigation_graph(evaluation.navigation_graph, evaluation.website_url)
                 
                 # Save screenshots
-                screenshots = self._save_screenshots(task_id, attempt, history_file)
+                screenshots = await self._save_screenshots(task_id, attempt, history_data)
                 
                 # Update metadata for next attempts
                 current_task_title = evaluation.task_title
@@ -421,7 +565,9 @@ Follow this guide to complete the task efficiently and avoid common pitfalls."""
                     logger.info("✅ Task completed successfully!")
                     
                     # Save to file system (compatibility)
-                    self._save_plans(task_id, evaluation.guide)
+                    await self._save_plans(task_id, evaluation.guide)
+                    if evaluation.guide:
+                        await self._record_successful_plan(task, website_url, task_id)
                     
                     results['final_status'] = 'SUCCESS'
                     results['successful_plan'] = evaluation.guide
@@ -429,8 +575,13 @@ Follow this guide to complete the task efficiently and avoid common pitfalls."""
                 
                 # If failure, use failure_guide for next attempt
                 elif evaluation.task_label == 'FAILURE':
+                    # The speculative run follows the previous guide: only keep it if the evaluator brought nothing new
+                    if pending_run is not None and evaluation.failure_guide and evaluation.failure_guide != current_failure_guide:
+                        await self._discard_run(pending_run)
+                        pending_run = None
+                        logger.info("🛑 Speculative attempt cancelled, the next attempt uses the new guide")
                     current_failure_guide = evaluation.failure_guide
-                    self._save_plans(task_id, evaluation.guide)
+                    await self._save_plans(task_id, evaluation.guide)
                     logger.info("⚠️ Failure detected, failure_guide updated for next attempt")
                     
                 # If impossible, stop
@@ -448,25 +599,51 @@ Follow this guide to complete the task efficiently and avoid common pitfalls."""
                 }
                 results['attempts'].append(attempt_result)
         
+        # Discard a speculative run made useless by the evaluation
+        if pending_run is not None:
+            await self._discard_run(pending_run)
+            logger.info("🛑 Speculative attempt cancelled")
+        
+        # Wait for the history files still being written
+        for save_result in await asyncio.gather(*history_saves, return_exceptions=True):
+            if isinstance(save_result, Exception):
+                logger.error(f"❌ Error saving history: {save_result}")
+        
         # If all attempts failed
         if not results['final_status']:
             results['final_status'] = 'FAILURE_AFTER_MAX_ATTEMPTS'
             logger.warning("⚠️ Failure after maximum attempts")
         
         return results
+    
+    async def aclose(self):
+        """Release the clients held by the evaluator (the guide generator's HTTP client)"""
+        await self.guide_generator.aclose()
+    
+    async def __aenter__(self) -> "TaskEvaluator":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    @staticmethod
+    async def _discard_run(run: asyncio.Task):
+        """Cancel a speculative run and wait for it to release its browser session"""
+        run.cancel()
+        try:
+            await run
+        except (asyncio.CancelledError, Exception):
+            pass
 
-    def _save_screenshots(self, task_id: str, attempt: int, history_file: str):
-        """Save attempt screenshots"""
+    async def _save_screenshots(self, task_id: str, attempt: int, history_data: dict):
+        """Save attempt screenshots (file I/O runs in a worker thread to keep the event loop free)"""
         try:
-            # Load history
-            history_data = load_history_from_file(history_file)
-            
             # Create directory for this attempt
             screenshots_dir = self.screenshots_dir / f"{task_id}_attempt_{attempt}"
             screenshots_dir.mkdir(exist_ok=True)
             
             # Save all screenshots
-            saved_files = save_all_screenshots(history_data, str(screenshots_dir))
+            saved_files = await asyncio.to_thread(save_all_screenshots, history_data, str(screenshots_dir))
             
             logger.info(f"📸 Screenshots saved: {len(saved_files)} images in {screenshots_dir}")
             return saved_files
@@ -493,6 +670,7 @@ async def main():
 
     TASK = TASK + CREDENTIALS
     
+    evaluator = None
     try:
         # Create evaluator
         evaluator = TaskEvaluator(max_attempts=3)
@@ -533,6 +711,10 @@ async def main():
 
     except Exception as e:
         logger.error(f"❌ Error in main: {e}", exc_info=True)
+    finally:
+        if evaluator is not None:
+            await evaluator.aclose()
+        await close_shared_browser()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+"""
+Lazy loading of the prompt texts stored in `_resources/`.
+"""
+
+from functools import lru_cache
+from importlib import resources
+
+
+@lru_cache(maxsize=None)
+def load_prompt(filename: str) -> str:
+    """Read a prompt from `_resources/` once per process"""
+    return resources.files(__package__).joinpath('_resources', filename).read_text(encoding='utf-8')
@@ -1,70 +1,17 @@
-SYSTEM_PROMPT_PROMPT_AGGREGATION = """You are a web navigation analysis assistant tasked with building a comprehensive navigation graph of a website for a user.
+"""
+Prompt for merging navigation graphs of the same website.
 
-Multiples users have navigated a website . For each attempt, a navigation graph was generated using a DSL-style JSON format.
+The text lives in `_resources/graph_aggregation_system.txt` and is only read on first access.
+"""
 
-Your goal is to merge these multiple navigation graphs into a single, unified and exhaustive graph, using the DSL format below. Each graph contains partial knowledge of the site; your role is to consolidate it intelligently.
+from ._loader import load_prompt
 
-
-## Input
-
-You are provided with:
-- A set of partial navigation graphs (in DSL-style JSON), each covering part of the website.
-
-
-## Task Plan
-
-### Step 1: Identify and merge pages
-
-- Group pages across graphs by **URL** (use the truncated version).
-- If different names are used, choose the most representative or neutral one (e.g., “Order Details Page” instead of “My Orders”).
-  - Descriptions
-  - DSL `elements` lists (merging grouped items, avoiding duplicates)
-  - `outgoing_links`
-
-### Step 2: Construct the unified graph
-
-For each page in the final graph, return the following structure:
-
-```json
-{
-  "Page Name": {
-    "url": "/domain/path",
-    "layout": "Short summary of the page's layout and purpose.",
-    "elements": [
-      "C: Menu items ['Se connecter', 'Mes commandes', 'Déconnexion'] @top-right dropdown",
-      "C: Navigation bar ['Factures', 'Commandes', 'Profil'] @top",
-      "I: Search bar @center",
-      "C: Icons [<icon:download>, <icon:facture>] @bottom-right",
-      "U: [icon:printer-looking] @sidebar"
-    ],
-    "outgoing_links": [
-        {
-            "target": "Invoice Page",
-            "action": "click on the invoice icon in the sidebar"
-        },
-        {
-            "target": "Order Details Page",
-            "action": "click on the 'Mes commandes' button in the top-right dropdown"
-        }
-        ]
-  }
+_PROMPT_FILES = {
+    'SYSTEM_PROMPT_PROMPT_AGGREGATION': 'graph_aggregation_system.txt',
 }
-````
-* `C:` = Clickable elements
-* `I:` = Input fields
-* Keep the `elements` list **semantically grouped** and **token-efficient**.
-* Avoid duplication. Merge equivalent elements.
-* Include all observed outgoing transitions.
-* Use `<icon:...>` and `U:` for unlabeled but recognizable icons/buttons.
-* outgoing_links should refer to visited pages by their matching names in the graph (will be used for visualisation and drawing edges)
-* Never invent UI elements not present in the graph.
-* Never suggest vague strategies like “look for billing” — be precise and grounded in observed UI.
 
-* Please, be smart and create a generic page for pages that can be adapted for different product/service etc.
-For example, create a generic "Product Page" that can be adapted for different products (with all generic elements).
-Create a generic "Search Results Page" that can be adapted for different search results (with all generic elements).
-Etc.
-Don't create page for each product, it could be very long!
 
-Don't forget to use the tags ```json and ``` at the beginning and end of the output for easy parsing.
-"""
\ No newline at end of file
+def __getattr__(name: str) -> str:
+    if name in _PROMPT_FILES:
+        return load_prompt(_PROMPT_FILES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
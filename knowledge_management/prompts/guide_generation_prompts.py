@@ -1,68 +1,65 @@
 """
 Prompts pour la génération de guides optimisés basés sur les connaissances accumulées.
-"""
-
-GUIDE_GENERATION_SYSTEM_PROMPT = """You are an expert web automation strategist. Your role is to analyze a task, previous successful plans, navigation patterns, and previous attempts to generate an optimized execution guide.
 
-Your goal is to create a comprehensive, step-by-step guide that will help an AI agent successfully complete the task by leveraging:
-1. The website's structure through navigation graphs (if any)
-2. Lessons learned from previous failed attempts (if any)
-3. Previous recommendations from evaluator that did not work (if any)
+Les textes sont dans `_resources/` et ne sont lus qu'au premier accès.
+Le prompt utilisateur est découpé en deux sections : le contexte stable d'une tâche (tâche, plans RAG,
+graph de navigation), mis en cache côté fournisseur, puis la partie propre à chaque tentative.
+"""
 
-## Your Output Format
+from functools import lru_cache
+from string import Formatter
+from typing import Tuple
 
-Generate a guide in the following structure:
+from ._loader import load_prompt
 
-### Task Analysis
-Brief analysis of what needs to be accomplished
+_PROMPT_FILES = {
+    'GUIDE_GENERATION_SYSTEM_PROMPT': 'guide_generation_system.txt',
+}
 
-### Key Insights from Previous Plans
-- Extract relevant strategies from successful plans
-- Identify common patterns and approaches
-- Note any specific website quirks or requirements
+# Sections du prompt utilisateur, dans l'ordre
+_USER_PROMPT_SECTION_FILES = (
+    'guide_generation_user_context.txt',
+    'guide_generation_user_attempt.txt',
+)
 
-### Navigation Strategy
-- Use the navigation graph to understand the website structure
-- Identify optimal paths to achieve the goal
-- Consider alternative routes if primary paths fail
 
-### Execution Plan
-Detailed step-by-step guide:
-1. [Specific action with clear instructions]
-2. [Next action with expected outcomes]
-3. [Continue with detailed steps...]
+def __getattr__(name: str) -> str:
+    if name in _PROMPT_FILES:
+        return load_prompt(_PROMPT_FILES[name])
+    if name == 'GUIDE_GENERATION_USER_PROMPT_TEMPLATE':
+        return ''.join(load_prompt(filename) for filename in _USER_PROMPT_SECTION_FILES)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-### Potential Challenges & Solutions
-- Anticipate common issues based on previous attempts
-- Provide fallback strategies
-- Include verification steps
 
-## Guidelines
+@lru_cache(maxsize=None)
+def _compiled_template(filename: str) -> str:
+    """Traduit une seule fois un template str.format en template '%(champ)s', rendu ensuite en une opération"""
+    pieces = []
+    for literal, field, _, _ in Formatter().parse(load_prompt(filename)):
+        pieces.append(literal.replace('%', '%%'))
+        if field is not None:
+            pieces.append(f'%({field})s')
+    return ''.join(pieces)
 
-- Be specific and actionable
-- Include expected outcomes for each step
-- Reference specific UI elements when possible
-- Consider the website's unique characteristics
-- Adapt strategies from successful plans to the current task
-- Address any issues mentioned in previous failed attempts
-- Keep the guide concise but comprehensive
 
-Remember: Your guide should enable an AI agent to execute the task efficiently while avoiding common pitfalls identified in previous attempts."""
+def _render(filename: str, fields: dict) -> str:
+    return _compiled_template(filename) % fields
 
-GUIDE_GENERATION_USER_PROMPT_TEMPLATE = """## Current Task
-{task}
 
-## Previous Successful Plans for Tasks that could be useful:
-{rag_plans_context}
+def render_guide_user_prompt_sections(**fields) -> Tuple[str, str]:
+    """
+    Rend le prompt utilisateur en deux sections : (contexte stable de la tâche, partie propre à la tentative)
 
-## Website Navigation Graph (to understand the website structure)
-{navigation_graph_context}
+    Les champs absents du template sont ignorés, comme avec str.format.
+    """
+    context_file, attempt_file = _USER_PROMPT_SECTION_FILES
+    return _render(context_file, fields), _render(attempt_file, fields)
 
-## Previous Attempt Guide (if applicable)
-An evaluator reviewed the previous attempt and left the following recommendations to try. This could be helpful recommendations that have not beed tried.
-{previous_guide_context}
 
-## Additional Context
-- Website URL: {website_url}
+def render_guide_user_prompt(**fields) -> str:
+    """
+    Équivalent de GUIDE_GENERATION_USER_PROMPT_TEMPLATE.format(**fields), sans réanalyser le template à chaque appel
 
-Please generate an optimized execution guide for this task.""" 
\ No newline at end of file
+    Les champs absents du template sont ignorés, comme avec str.format.
+    """
+    return ''.join(render_guide_user_prompt_sections(**fields))
@@ -3,6 +3,7 @@
 Test script for the complete system with the new simplified implementation.
 """
 
+import asyncio
 import json
 import logging
 from pathlib import Path
@@ -18,7 +19,45 @@ sys.path.append(str(Path(__file__).parent))
 from utils.navigation_graph_manager import NavigationGraphManager
 from utils.plan_rag_manager import PlanRAGManager
 
-def test_complete_system():
+# Test fixtures, built once at import
+TEST_GRAPH = {
+    "Home Page": {
+        "url": "https://www.airbnb.com/",
+        "layout": "Main Airbnb homepage",
+        "elements": [
+            "C: Property cards with 'Guest favorite' badges @grid-layout",
+            "C: 'Log in or sign up' button @bottom-center"
+        ],
+        "outgoing_links": [
+            {
+                "target": "Login Modal",
+                "action": "click on 'Log in or sign up' button"
+            }
+        ]
+    },
+    "Login Modal": {
+        "url": "https://www.airbnb.com/",
+        "layout": "Modal overlay for user authentication",
+        "elements": [
+            "I: Email input field @center",
+            "I: Password input field @center",
+            "C: Continue/Login button @bottom-of-modal"
+        ],
+        "outgoing_links": [
+            {
+                "target": "Home Page",
+                "action": "successful login returns to homepage"
+            }
+        ]
+    }
+}
+
+TEST_PLANS = {
+    "Login and search properties on Airbnb": "1. Navigate to airbnb.com\n2. Click login button\n3. Enter credentials\n4. Search for properties",
+    "Filter properties by amenities": "1. On search results page\n2. Scroll to filters section\n3. Select desired amenities\n4. Apply filters"
+}
+
+async def test_complete_system():
     """Test the complete system with the new implementation"""
     
     print("🧪 Testing the simplified complete system")
@@ -43,40 +82,8 @@ def test_complete_system():
     print("\n📊 Test 1: Save navigation graph")
     print("-" * 40)
     
-    test_graph = {
-        "Home Page": {
-            "url": "https://www.airbnb.com/",
-            "layout": "Main Airbnb homepage",
-            "elements": [
-                "C: Property cards with 'Guest favorite' badges @grid-layout",
-                "C: 'Log in or sign up' button @bottom-center"
-            ],
-            "outgoing_links": [
-                {
-                    "target": "Login Modal",
-                    "action": "click on 'Log in or sign up' button"
-                }
-            ]
-        },
-        "Login Modal": {
-            "url": "https://www.airbnb.com/",
-            "layout": "Modal overlay for user authentication",
-            "elements": [
-                "I: Email input field @center",
-                "I: Password input field @center",
-                "C: Continue/Login button @bottom-of-modal"
-            ],
-            "outgoing_links": [
-                {
-                    "target": "Home Page",
-                    "action": "successful login returns to homepage"
-                }
-            ]
-        }
-    }
-    
     # Save graph
-    success = nav_manager.save_navigation_graph(test_graph, "http://airbnb.com")
+    success = await nav_manager.save_navigation_graph(TEST_GRAPH, "http://airbnb.com")
     print(f"  Graph save: {'✅' if success else '❌'}")
     
     # Test 2: Search saved graph
@@ -118,8 +125,11 @@ def test_complete_system():
         "http://booking.com"
     ]
     
-    for url in test_urls:
-        graphs = nav_manager.find_navigation_graphs_for_website(url)
+    # Scan the graphs directory once, every lookup below is answered from this index
+    graph_files = nav_manager.list_graph_files()
+    print(f"  Indexed graph files: {len(graph_files)}")
+    
+    for url, graphs in zip(test_urls, nav_manager.match_urls(test_urls)):
         print(f"  {url}: {len(graphs)} graph(s)")
         if graphs:
             print(f"    → Found: {graphs[0]['file_path']}")
@@ -129,12 +139,7 @@ def test_complete_system():
     print("-" * 40)
     
     # Save test plan
-    test_plans = {
-        "Login and search properties on Airbnb": "1. Navigate to airbnb.com\n2. Click login button\n3. Enter credentials\n4. Search for properties",
-        "Filter properties by amenities": "1. On search results page\n2. Scroll to filters section\n3. Select desired amenities\n4. Apply filters"
-    }
-    
-    success = rag_manager.store_successful_plan(test_plans, "test_001")
+    success = rag_manager.store_successful_plan(TEST_PLANS, "test_001")
     print(f"  RAG plan save: {'✅' if success else '❌'}")
     
     # Search similar plans
@@ -155,7 +160,7 @@ def test_complete_system():
     print(f"  Unique task titles (RAG): {rag_stats['unique_task_titles']}")
     
     # Count navigation graphs
-    nav_graphs = list(nav_manager.graphs_dir.glob("*_graph.json"))
+    nav_graphs = nav_manager.list_graph_files()
     print(f"  Navigation graphs: {len(nav_graphs)}")
     for graph_file in nav_graphs:
         print(f"    {graph_file.name}")
@@ -163,4 +168,4 @@ def test_complete_system():
     print("\n✅ Test completed!")
 
 if __name__ == "__main__":
-    test_complete_system() 
\ No newline at end of file
+    asyncio.run(test_complete_system())
\ No newline at end of file
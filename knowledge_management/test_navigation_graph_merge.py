@@ -5,11 +5,9 @@ This script tests the new navigation graph merging feature to ensure it works co
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
-from pathlib import Path
 
 # Add project path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -17,7 +15,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from dotenv import load_dotenv
 
 # Local imports
-from knowledge_management.utils.navigation_graph_manager import NavigationGraphManager
+from knowledge_management.utils.navigation_graph_manager import get_navigation_graph_manager, union_navigation_graphs
+from knowledge_management.utils.json_utils import dumps_json, loads_json
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,6 +26,19 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
+def _dump_prefix(graph: dict, max_chars: int = 500) -> str:
+    """Serialize the graph page by page, stopping once max_chars characters are produced"""
+    parts = []
+    length = 0
+    for page, content in graph.items():
+        entry = f"  {dumps_json(page)}: {dumps_json(content)},\n"
+        parts.append(entry)
+        length += len(entry)
+        if length >= max_chars:
+            break
+    return ("{\n" + "".join(parts))[:max_chars]
+
+
 async def test_navigation_graph_merge():
     """Test the navigation graph merging functionality"""
     
@@ -106,7 +118,7 @@ async def test_navigation_graph_merge():
     
     try:
         # Create navigation graph manager
-        nav_manager = NavigationGraphManager()
+        nav_manager = get_navigation_graph_manager()
         
         logger.info("🧪 Testing navigation graph merging functionality...")
         
@@ -136,7 +148,7 @@ async def test_navigation_graph_merge():
         
         if graphs:
             graph_content = graphs[0]['graph_content']
-            merged_graph = json.loads(graph_content)
+            merged_graph = loads_json(graph_content)
             
             print("\n" + "="*60)
             print("🧪 MERGE TEST RESULTS")
@@ -147,10 +159,10 @@ async def test_navigation_graph_merge():
             print(f"📊 Merged graph pages: {list(merged_graph.keys())}")
             
             # Check if all pages are present
-            all_pages = set(existing_graph.keys()) | set(new_graph.keys())
-            merged_pages = set(merged_graph.keys())
+            all_pages = existing_graph.keys() | new_graph.keys()
+            merged_pages = merged_graph.keys()
             
-            if all_pages.issubset(merged_pages):
+            if all_pages <= merged_pages:
                 print(f"✅ All pages successfully merged!")
             else:
                 missing_pages = all_pages - merged_pages
@@ -162,16 +174,23 @@ async def test_navigation_graph_merge():
                 print(f"\n🏠 Home Page elements in merged graph: {len(home_elements)}")
                 
                 # Check for specific elements from both graphs
-                has_search = any("Search bar" in elem for elem in home_elements)
-                has_services = any("Services" in elem for elem in home_elements)
-                has_signup = any("Sign up" in elem for elem in home_elements)
+                home_text = "\n".join(home_elements)
+                has_search = "Search bar" in home_text
+                has_services = "Services" in home_text
+                has_signup = "Sign up" in home_text
+                
+                # Compare against the deterministic union of both input graphs
+                expected_home = union_navigation_graphs(existing_graph, new_graph)["Home Page"]
+                missing_elements = set(expected_home["elements"]) - set(home_elements)
+                if missing_elements:
+                    print(f"  ℹ️ Elements not kept verbatim by the merge: {len(missing_elements)}")
                 
                 print(f"  - Search bar: {'✅' if has_search else '❌'}")
                 print(f"  - Services menu: {'✅' if has_services else '❌'}")
                 print(f"  - Sign up button: {'✅' if has_signup else '❌'}")
             
             print(f"\n📄 Merged graph content preview:")
-            print(json.dumps(merged_graph, indent=2)[:500] + "...")
+            print(_dump_prefix(merged_graph, max_chars=500) + "...")
             
         else:
             print(f"\n❌ No merged graph found")
@@ -8,17 +8,97 @@ This module generates optimized guides by combining:
 4. LLM-based guide generation
 """
 
+import hashlib
 import logging
 import os
-from typing import List, Dict, Any, Optional, Literal
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Final, Optional, Literal
+
+import httpx
 
 from browser_use.llm import ChatAnthropic, ChatOpenAI
 from browser_use.llm.messages import SystemMessage, UserMessage
 
-from ..prompts.guide_generation_prompts import GUIDE_GENERATION_SYSTEM_PROMPT, GUIDE_GENERATION_USER_PROMPT_TEMPLATE
+from ..prompts import guide_generation_prompts
+from .navigation_graph_manager import NO_NAVIGATION_CONTEXT
 
 logger = logging.getLogger(__name__)
 
+# Context placeholders returned when there is nothing to provide (NO_NAVIGATION_CONTEXT comes from
+# the navigation graph manager), recognized by generate_optimized_guide
+NO_RAG_PLANS_CONTEXT: Final = "No similar successful plans found in RAG database."
+NO_PREVIOUS_GUIDE_CONTEXT: Final = "No previous attempt guide available."
+
+# Fallback guides, used when the LLM call fails
+FALLBACK_GUIDE_TEMPLATE_NO_PREV = """## Fallback Guide (Generated due to system error)
+
+**Task:** {task}
+
+### Basic Approach:
+1. Identify the main elements needed for the task
+2. Follow a logical sequence of actions
+3. Verify each step before proceeding
+4. Check for success indicators
+
+**Note:** This is a fallback guide. Consider reviewing the task requirements carefully."""
+
+FALLBACK_GUIDE_TEMPLATE_WITH_PREV = """## Fallback Guide (Generated due to system error)
+
+**Task:** {task}
+
+### Basic Approach:
+1. Identify the main elements needed for the task
+2. Follow a logical sequence of actions
+3. Verify each step before proceeding
+4. Check for success indicators
+
+### Previous Attempt Insights:
+{previous}
+This guide was previously used to try to complete the task but did not work.
+
+**Note:** This is a fallback guide. Consider reviewing the task requirements carefully."""
+
+# Task type keywords, by priority: the first category with a keyword in the task wins.
+_TASK_TYPE_KEYWORDS = (
+    ("Authentication", ('login', 'sign in', 'authenticate')),
+    ("Search", ('search', 'find', 'look for')),
+    ("Creation/Booking", ('save', 'add', 'create', 'book')),
+    ("Deletion/Cancellation", ('remove', 'delete', 'cancel')),
+    ("Navigation", ('navigate', 'go to', 'visit')),
+)
+_TASK_TYPE_CATEGORIES = tuple(category for category, _ in _TASK_TYPE_KEYWORDS)
+
+# A single anchored pattern: one lookahead branch per category, tried in priority order, each
+# ending in an empty group so match.lastindex tells which category matched.
+_TASK_TYPE_RE = re.compile(
+    '|'.join(
+        f"(?=.*?(?:{'|'.join(re.escape(keyword) for keyword in keywords)}))()"
+        for _, keywords in _TASK_TYPE_KEYWORDS
+    ),
+    re.DOTALL,
+)
+
+
+# Number of generated guides kept in memory, keyed by a hash of their inputs
+GUIDE_CACHE_SIZE = 128
+
+_TRAILING_WHITESPACE_RE = re.compile(r'[ \t]+$', re.MULTILINE)
+_EXTRA_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _compact_context(context: str) -> str:
+    """Strip trailing whitespace and collapse runs of blank lines in a prompt context (content is kept whole)"""
+    return _EXTRA_BLANK_LINES_RE.sub('\n\n', _TRAILING_WHITESPACE_RE.sub('', context)).strip()
+
+
+@lru_cache(maxsize=1024)
+def _classify_task(task_lower: str) -> str:
+    """Task type of an already lowercased task, memoized since retries reclassify the same task"""
+    match = _TASK_TYPE_RE.match(task_lower)
+    return _TASK_TYPE_CATEGORIES[match.lastindex - 1] if match else "General"
+
 
 class GuideGenerator:
     """Optimized guide generator service"""
@@ -32,36 +112,65 @@ class GuideGenerator:
         """
         self.llm_provider = llm_provider
         
-        # Initialize LLM for guide generation
-        self.guide_llm = None
+        # The LLM client is only built on first use (see guide_llm), guide generation is often skipped
+        self._guide_llm = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._api_key = None
+        
+        # Guides already generated for identical inputs, most recently used last
+        self._guide_cache: "OrderedDict[str, str]" = OrderedDict()
         
         if llm_provider == "anthropic":
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if api_key:
-                self.guide_llm = ChatAnthropic(
-                    model="claude-sonnet-4-20250514",
-                    api_key=api_key,
-                    max_tokens=4000,
-                    temperature=0.2
-                )
-            else:
+            self._api_key = os.getenv('ANTHROPIC_API_KEY')
+            if not self._api_key:
                 logger.warning("⚠️ ANTHROPIC_API_KEY non défini, la génération de guides sera désactivée")
         elif llm_provider == "openai":
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key:
-                self.guide_llm = ChatOpenAI(
-                    model="gpt-4o",
-                    api_key=api_key,
-                    max_tokens=4000,
-                    temperature=0.2
-                )
-            else:
+            self._api_key = os.getenv('OPENAI_API_KEY')
+            if not self._api_key:
                 logger.warning("⚠️ OPENAI_API_KEY non défini, la génération de guides sera désactivée")
         else:
             logger.warning(f"⚠️ Fournisseur LLM non reconnu: {llm_provider}, la génération de guides sera désactivée")
         
         logger.info(f"🎯 Guide Generator initialisé avec {llm_provider}")
     
+    @property
+    def guide_llm(self):
+        """LLM for guide generation, created on first access (None if no API key is available)"""
+        if self._guide_llm is None and self._api_key:
+            # One long-lived HTTP client so retries and later attempts reuse the same keep-alive connection
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=8))
+            if self.llm_provider == "anthropic":
+                self._guide_llm = ChatAnthropic(
+                    model="claude-sonnet-4-20250514",
+                    api_key=self._api_key,
+                    max_tokens=4000,
+                    temperature=0.2,
+                    http_client=self._http_client
+                )
+            elif self.llm_provider == "openai":
+                self._guide_llm = ChatOpenAI(
+                    model="gpt-4o",
+                    api_key=self._api_key,
+                    max_tokens=4000,
+                    temperature=0.2,
+                    http_client=self._http_client
+                )
+        return self._guide_llm
+    
+    async def aclose(self):
+        """Close the HTTP client shared by guide generation calls"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._guide_llm = None
+    
+    async def __aenter__(self) -> "GuideGenerator":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
     async def generate_optimized_guide(
         self,
         task: str,
@@ -92,7 +201,11 @@ class GuideGenerator:
             task_type = self._determine_task_type(task)
 
             # If no context at all, don't generate a guide
-            if not rag_plans_context and not navigation_graph_context and not previous_guide_context:
+            if (
+                (not rag_plans_context or rag_plans_context == NO_RAG_PLANS_CONTEXT)
+                and (not navigation_graph_context or navigation_graph_context == NO_NAVIGATION_CONTEXT)
+                and (not previous_guide_context or previous_guide_context == NO_PREVIOUS_GUIDE_CONTEXT)
+            ):
                 logger.info("🔍 No context provided, skipping guide generation")
                 return ""
             
@@ -117,20 +230,7 @@ class GuideGenerator:
     
     def _determine_task_type(self, task: str) -> str:
         """Determine task type based on content"""
-        task_lower = task.lower()
-        
-        if any(word in task_lower for word in ['login', 'sign in', 'authenticate']):
-            return "Authentication"
-        elif any(word in task_lower for word in ['search', 'find', 'look for']):
-            return "Search"
-        elif any(word in task_lower for word in ['save', 'add', 'create', 'book']):
-            return "Creation/Booking"
-        elif any(word in task_lower for word in ['remove', 'delete', 'cancel']):
-            return "Deletion/Cancellation"
-        elif any(word in task_lower for word in ['navigate', 'go to', 'visit']):
-            return "Navigation"
-        else:
-            return "General"
+        return _classify_task(task.lower())
     
     async def _generate_guide_with_llm(
         self,
@@ -149,52 +249,47 @@ class GuideGenerator:
             logger.warning("⚠️ LLM non disponible, utilisation du guide de fallback")
             return self._generate_fallback_guide(task, previous_guide_context)
         
-        # Build user prompt
-        user_prompt = GUIDE_GENERATION_USER_PROMPT_TEMPLATE.format(
+        # Identical inputs produce the same prompt, reuse the guide instead of calling the LLM again
+        cache_key = hashlib.blake2b(
+            '\x00'.join((
+                task, task_type, website_url, rag_plans_context, navigation_graph_context, previous_guide_context
+            )).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        cached_guide = self._guide_cache.get(cache_key)
+        if cached_guide is not None:
+            self._guide_cache.move_to_end(cache_key)
+            logger.info("♻️ Reusing guide generated for identical inputs")
+            return cached_guide
+        
+        # Build user prompt: the task's stable context first, then what changes between attempts
+        task_context_prompt, attempt_prompt = guide_generation_prompts.render_guide_user_prompt_sections(
             task=task,
-            rag_plans_context=rag_plans_context,
-            navigation_graph_context=navigation_graph_context,
-            previous_guide_context=previous_guide_context,
+            rag_plans_context=_compact_context(rag_plans_context),
+            navigation_graph_context=_compact_context(navigation_graph_context),
+            previous_guide_context=_compact_context(previous_guide_context),
             website_url=website_url,
             task_type=task_type,
             attempt_count=attempt_count
         )
         
-        # Create messages
-        system_message = SystemMessage(content=GUIDE_GENERATION_SYSTEM_PROMPT)
-        user_message = UserMessage(content=user_prompt)
+        # Create messages, the system prompt and task context form a prefix cached across retries
+        system_message = SystemMessage(content=guide_generation_prompts.GUIDE_GENERATION_SYSTEM_PROMPT, cache=True)
+        context_message = UserMessage(content=task_context_prompt, cache=True)
+        attempt_message = UserMessage(content=attempt_prompt)
         
         # Call LLM
         logger.info("🤖 Generating guide with LLM...")
-        response = await self.guide_llm.ainvoke([system_message, user_message])
+        response = await self.guide_llm.ainvoke([system_message, context_message, attempt_message])
+        
+        self._guide_cache[cache_key] = response.completion
+        if len(self._guide_cache) > GUIDE_CACHE_SIZE:
+            self._guide_cache.popitem(last=False)
         
         return response.completion
     
     def _generate_fallback_guide(self, task: str, previous_guide_context: str) -> str:
         """Generate fallback guide in case of error"""
-        fallback_parts = [
-            "## Fallback Guide (Generated due to system error)",
-            "",
-            f"**Task:** {task}",
-            "",
-            "### Basic Approach:",
-            "1. Identify the main elements needed for the task",
-            "2. Follow a logical sequence of actions",
-            "3. Verify each step before proceeding",
-            "4. Check for success indicators",
-            ""
-        ]
-        
-        if previous_guide_context and previous_guide_context != "No previous attempt guide available.":
-            fallback_parts.extend([
-                "### Previous Attempt Insights:",
-                previous_guide_context,
-                "This guide was previously used to try to complete the task but did not work.",
-                ""
-            ])
-        
-        fallback_parts.append(
-            "**Note:** This is a fallback guide. Consider reviewing the task requirements carefully."
-        )
-        
-        return "\n".join(fallback_parts) 
\ No newline at end of file
+        if previous_guide_context and previous_guide_context != NO_PREVIOUS_GUIDE_CONTEXT:
+            return FALLBACK_GUIDE_TEMPLATE_WITH_PREV.format(task=task, previous=previous_guide_context)
+        return FALLBACK_GUIDE_TEMPLATE_NO_PREV.format(task=task)
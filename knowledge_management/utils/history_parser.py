@@ -1,24 +1,34 @@
-import json
-import base64
 import logging
-from typing import List, Dict, Any, Optional
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator
 from pathlib import Path
-from PIL import Image
-import io
-
-# Import des classes LLM de Browser-Use
-from browser_use.llm.messages import (
-    UserMessage, 
-    ContentPartTextParam, 
-    ContentPartImageParam, 
-    ImageURL,
-    BaseMessage
-)
-
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# pybase64 (SIMD) a la même API que base64, plusieurs fois plus rapide sur les gros screenshots
+try:
+    import pybase64 as base64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    import base64
+    PYBASE64_AVAILABLE = False
+
+# Les classes de messages de Browser-Use ne sont importées que par history_to_llm_messages :
+# importer browser_use.llm charge tous les fournisseurs LLM, inutile pour sauvegarder des screenshots
+if TYPE_CHECKING:
+    from browser_use.llm.messages import BaseMessage
+
+from .json_utils import dumps_json_bytes, loads_json, read_json_file
+
 logger = logging.getLogger(__name__)
 
+# Threads décodant et écrivant les screenshots en parallèle
+SCREENSHOT_SAVE_WORKERS = 8
+
+# Préfixe des data URLs des screenshots envoyés au LLM
+PNG_DATA_URL_PREFIX = "data:image/png;base64,"
+
 
 def load_history_from_file(file_path: str) -> Dict[str, Any]:
     """
@@ -30,73 +40,90 @@ def load_history_from_file(file_path: str) -> Dict[str, Any]:
     Returns:
         Dictionnaire contenant l'historique
     """
-    logger.info(f"Loading history from file: {file_path}")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    logger.info(f"Successfully loaded history with {len(data.get('history', []))} steps")
+    logger.info("Loading history from file: %s", file_path)
+    if file_path.endswith('.ndjson'):
+        data = {'history': list(iter_history_steps(file_path))}
+    else:
+        data = read_json_file(file_path)
+    logger.info("Successfully loaded history with %d steps", len(data.get('history', [])))
     return data
 
+def save_history_ndjson(history_data: Dict[str, Any], file_path: str) -> None:
+    """
+    Sauvegarde l'historique au format NDJSON (une étape par ligne)
+    
+    Args:
+        history_data: Données de l'historique
+        file_path: Chemin du fichier NDJSON de sortie
+    """
+    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, 'wb') as f:
+        for step in history_data.get('history', []):
+            f.write(dumps_json_bytes(step, indent=False))
+            f.write(b'\n')
+
+
+def iter_history_steps(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lit un historique NDJSON étape par étape, sans charger tout le fichier en mémoire
+    
+    Args:
+        file_path: Chemin vers le fichier NDJSON d'historique
+        
+    Yields:
+        Dictionnaire de chaque étape
+    """
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads_json(line)
+
+
+def _describe_select_dropdown_option(params: Dict[str, Any]) -> str:
+    text = str(params.get('text', ''))
+    if text:
+        return f'The user clicked on dropdown option {text}.'
+    return f"The user clicked on dropdown option {params.get('index', 'unknown')}."
+
+
+# Description of each action, by action name
+_ACTION_FORMATTERS = {
+    'click_element_by_index': lambda p: f"The user clicked on element {p.get('index', 'unknown')}.",
+    'get_dropdown_options': lambda p: f"The user clicked on dropdown option {p.get('index', 'unknown')}.",
+    'select_dropdown_option': _describe_select_dropdown_option,
+    'input_text': lambda p: f"The user typed: '{p.get('text', 'unknown text')}' in element {p.get('index', 'unknown')}.",
+    'scroll_down': lambda p: f"The user scrolled down for {p.get('amount', 'unknown')} pixels.",
+    'scroll_up': lambda p: f"The user scrolled up for {p.get('amount', 'unknown')} pixels.",
+    'switch_tab': lambda p: f"The user switched to tab {p.get('page_id', 'unknown')}.",
+    'go_to_url': lambda p: f"The user navigated to: {p.get('url', 'unknown url')}",
+    'write_file': lambda p: f"The user wrote to file: {p.get('file_name', 'unknown file')}",
+    'search_google': lambda p: f"The user searched Google for: '{p.get('query', 'unknown query')}'",
+    'wait': lambda p: f"The user waited for {p.get('seconds', 'unknown')} seconds.",
+    'done': lambda p: "The user stopped the tasks",  # no need to detail
+}
+
+
 def get_detailed_action_decription(action):
     """
     Return action description with additional details for some specifc actions."""
 
     # Get the action name (first key in the dictionary)
-    action_name = list(action.keys())[0]
-    action_params = action[action_name]
-
-    if action_name == 'click_element_by_index':
-        element_id = str(action_params.get('index', 'unknown'))
-        return f'The user clicked on element {element_id}.'
-    elif action_name == 'get_dropdown_options':
-        element_id = str(action_params.get('index', 'unknown'))
-        return f'The user clicked on dropdown option {element_id}.'
-    elif action_name == 'select_dropdown_option':
-        text = str(action_params.get('text', ''))
-        if text:
-            return f'The user clicked on dropdown option {text}.'
-        element_id = str(action_params.get('index', 'unknown'))
-        return f'The user clicked on dropdown option {element_id}.'
-    elif action_name == 'input_text':
-        element_id = str(action_params.get('index', 'unknown'))
-        text = action_params.get('text', 'unknown text')
-        return f"The user typed: '{text}' in element {element_id}."
-    elif action_name == 'scroll_down':
-        amount = str(action_params.get('amount', 'unknown'))
-        return f"The user scrolled down for {amount} pixels."
-    elif action_name == 'scroll_up':
-        amount = str(action_params.get('amount', 'unknown'))
-        return f"The user scrolled up for {amount} pixels."
-    elif action_name == 'switch_tab':
-        page_id = str(action_params.get('page_id', 'unknown'))
-        return f"The user switched to tab {page_id}."
-    elif action_name == 'go_to_url':
-        url = action_params.get('url', 'unknown url')
-        return f"The user navigated to: {url}"
-    elif action_name == 'write_file':
-        file_name = action_params.get('file_name', 'unknown file')
-        return f"The user wrote to file: {file_name}"
-    elif action_name == 'search_google':
-        query = action_params.get('query', 'unknown query')
-        return f"The user searched Google for: '{query}'"
-    elif action_name == 'wait':
-        seconds = str(action_params.get('seconds', 'unknown'))
-        return f"The user waited for {seconds} seconds."
-    elif action_name == 'done':
-        success = action_params.get('success', 'unknown')
-        text = action_params.get('text', 'no text')
-        return f"The user stopped the tasks" # no need to detail
-    else:
+    action_name = next(iter(action))
+    formatter = _ACTION_FORMATTERS.get(action_name)
+    if formatter is None:
         return f"The user performed action: {action_name}"
+    return formatter(action[action_name])
 
 
 
-def save_screenshot_to_file(screenshot_base64: str, output_path: str) -> bool:
+def save_screenshot_to_file(screenshot_base64: str, output_path: str, ensure_dir: bool = True) -> bool:
     """
     Sauvegarde un screenshot base64 vers un fichier image
     
     Args:
         screenshot_base64: Données base64 du screenshot
         output_path: Chemin de sortie pour l'image
+        ensure_dir: Créer le dossier parent si nécessaire (False si l'appelant l'a déjà créé)
         
     Returns:
         True si sauvegarde réussie, False sinon
@@ -106,21 +133,58 @@ def save_screenshot_to_file(screenshot_base64: str, output_path: str) -> bool:
         image_data = base64.b64decode(screenshot_base64)
         
         # Créer le dossier parent si nécessaire
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if ensure_dir:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        # Sauvegarder l'image
-        with open(output_path, 'wb') as f:
-            f.write(image_data)
+        # Sauvegarder l'image directement sur le descripteur, sans couche d'IO bufferisée (O_BINARY : pas de conversion des fins de ligne sous Windows)
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            remaining = memoryview(image_data)
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+        finally:
+            os.close(fd)
         
         return True
     except Exception as e:
-        logger.error(f"Erreur lors de la sauvegarde du screenshot: {e}")
+        logger.error("Erreur lors de la sauvegarde du screenshot: %s", e)
         return False
 
 
+def _save_step_screenshots(steps: Iterable[Dict[str, Any]], output_dir: str) -> List[str]:
+    """Sauvegarde en parallèle les screenshots d'une suite d'étapes au fil de l'itération, dans l'ordre des étapes"""
+    saved_files = []
+    output_dir = Path(output_dir)
+    output_prefix = f"{output_dir}/"
+    # Dossier créé une fois pour toutes les étapes
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Sauvegardes en cours, bornées pour garder peu de screenshots en mémoire quand les étapes sont lues en flux
+    pending = deque()
+    max_pending = 2 * SCREENSHOT_SAVE_WORKERS
+    
+    def collect_oldest():
+        output_path, future = pending.popleft()
+        if future.result():
+            saved_files.append(output_path)
+    
+    with ThreadPoolExecutor(max_workers=SCREENSHOT_SAVE_WORKERS) as executor:
+        for i, step in enumerate(steps):
+            screenshot = (step.get('state') or {}).get('screenshot', '')
+            if screenshot:
+                output_path = f"{output_prefix}step_{i}.png"
+                pending.append((output_path, executor.submit(save_screenshot_to_file, screenshot, output_path, ensure_dir=False)))
+                if len(pending) >= max_pending:
+                    collect_oldest()
+        
+        while pending:
+            collect_oldest()
+    
+    return saved_files
+
+
 def save_all_screenshots(history_data: Dict[str, Any], output_dir: str) -> List[str]:
     """
-    Sauvegarde tous les screenshots de l'historique (cropped to target size)
+    Sauvegarde tous les screenshots de l'historique
     
     Args:
         history_data: Données de l'historique
@@ -130,81 +194,20 @@ def save_all_screenshots(history_data: Dict[str, Any], output_dir: str) -> List[
         Liste des chemins des fichiers sauvegardés
     """
     logger.info("Starting to save all screenshots")
-    screenshots = []
-    
-    for i, step in enumerate(history_data.get('history', [])):
-        screenshot = step.get('state', {}).get('screenshot', '')
-        if screenshot:
-            # Crop the screenshot before saving
-            #cropped_screenshot = crop_screenshot(screenshot, {'width': 1280, 'height': 1100})
-            screenshots.append({
-                'step_number': i,
-                'screenshot_base64': screenshot
-            })
-    
-    saved_files = []
-    
-    for screenshot in screenshots:
-        step_number = screenshot['step_number']
-        filename = f"step_{step_number}.png"
-        output_path = Path(output_dir) / filename
-        
-        if save_screenshot_to_file(screenshot['screenshot_base64'], str(output_path)):
-            saved_files.append(str(output_path))
-    
-    logger.info(f"Saved {len(saved_files)} cropped screenshots")
+    saved_files = _save_step_screenshots(history_data.get('history', []), output_dir)
+    logger.info("Saved %d screenshots", len(saved_files))
     return saved_files
 
 
-def crop_screenshot(screenshot_base64: str, target_size: Dict[str, int] = {'width': 1280, 'height': 1100}) -> str:
-    """
-    Crop a base64 screenshot to the target size
-    SHOULD NO LONGER BE USED, WE NOW SAVE THE FULL SCREENSHOT
-    
-    Args:
-        screenshot_base64: Base64 encoded screenshot
-        target_size: Target size as {'width': int, 'height': int}
-        
-    Returns:
-        Cropped screenshot as base64 string
-    """
-    try:
-        # Decode base64 to image
-        image_data = base64.b64decode(screenshot_base64)
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Get original dimensions
-        original_width, original_height = image.size
-        target_width = target_size['width']
-        target_height = target_size['height']
-        
-        logger.debug(f"Original size: {original_width}x{original_height}, Target size: {target_width}x{target_height}")
-        
-        # Calculate crop box (center crop)
-        left = max(0, (original_width - target_width) // 2)
-        top = max(0, (original_height - target_height) // 2)
-        right = min(original_width, left + target_width)
-        bottom = min(original_height, top + target_height)
-        
-        # Crop the image
-        cropped_image = image.crop((left, top, right, bottom))
-        
-        # Convert back to base64
-        buffer = io.BytesIO()
-        cropped_image.save(buffer, format='PNG')
-        cropped_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        logger.debug(f"Cropped image from {original_width}x{original_height} to {cropped_image.size[0]}x{cropped_image.size[1]}")
-        return cropped_base64
-        
-    except Exception as e:
-        logger.warning(f"Failed to crop screenshot: {e}. Returning original.")
-        return screenshot_base64
+@lru_cache(maxsize=256)
+def _truncate_url(url: str, max_length: int = 100) -> str:
+    """URL tronquée pour les messages, mise en cache car les étapes d'une session répètent souvent la même URL"""
+    return url if len(url) <= max_length else url[:max_length] + '...'
 
 
-def history_to_llm_messages(history_data: Dict[str, Any]) -> List[BaseMessage]:
+def iter_history_llm_messages(history_data: Dict[str, Any]) -> Iterator['BaseMessage']:
     """
-    Convert history data to a list of LLM-compatible messages.
+    Convert history data to LLM-compatible messages, one step at a time.
     
     Each step in the history becomes a UserMessage containing:
     - Text content describing the actions taken
@@ -213,16 +216,20 @@ def history_to_llm_messages(history_data: Dict[str, Any]) -> List[BaseMessage]:
     Args:
         history_data: Loaded history data
         
-    Returns:
-        List of BaseMessage objects ready to be sent to LLM
+    Yields:
+        One BaseMessage per step, so callers that consume messages one by one never hold them all
     """
-    logger.info("Converting history to LLM messages")
+    from browser_use.llm.messages import (
+        UserMessage, 
+        ContentPartTextParam, 
+        ContentPartImageParam, 
+        ImageURL,
+    )
     
-    messages: List[BaseMessage] = []
     history_list = history_data.get('history', [])
     
     for i, step in enumerate(history_list):
-        logger.debug(f"Converting step {i} to LLM message")
+        logger.debug("Converting step %d to LLM message", i)
         
         # Extract actions text
         model_output = step.get('model_output', {})
@@ -234,33 +241,31 @@ def history_to_llm_messages(history_data: Dict[str, Any]) -> List[BaseMessage]:
                 action_strings.append(action_detailed)
         
         # Build the text content
-        actions_str = f"This is step {i}, "
-        
         url = step.get('state', {}).get('url', '')
+        url_str = ''
         if url:
-            truncated_url = url[:100] + '...' if len(url) > 100 else url
-            actions_str += f'the screenshot has been taken at this url {truncated_url}. '
+            url_str = f'the screenshot has been taken at this url {_truncate_url(url)}. '
         
         if len(action_strings) == 1:
-            actions_str += str(action_strings[0])
+            step_actions_str = action_strings[0]
         elif len(action_strings) > 1:
-            for j, action in enumerate(action_strings):
-                actions_str += f'The {j}th action taken for step {i} is ' + str(action_strings[j])
+            step_actions_str = ''.join(
+                f'The {j}th action taken for step {i} is {action}' for j, action in enumerate(action_strings)
+            )
         else:
-            actions_str += "No actions found for this step"
+            step_actions_str = "No actions found for this step"
+        
+        actions_str = f"This is step {i}, {url_str}{step_actions_str}"
         
         # Get screenshot
         screenshot = step.get('state', {}).get('screenshot', '')
         if screenshot:
-            # Crop screenshot to target size
-            #cropped_screenshot = crop_screenshot(screenshot, {'width': 1280, 'height': 1100})
-            
             # Create content parts: text + image
             content_parts = [
                 ContentPartTextParam(text=actions_str),
                 ContentPartImageParam(
                     image_url=ImageURL(
-                        url=f"data:image/png;base64,{screenshot}",
+                        url=PNG_DATA_URL_PREFIX + screenshot,
                         media_type='image/png',
                         detail='auto'
                     )
@@ -277,9 +282,22 @@ def history_to_llm_messages(history_data: Dict[str, Any]) -> List[BaseMessage]:
             name=f"step_{i}"
         )
         
-        messages.append(user_message)
-        logger.debug(f"Created message for step {i}: {actions_str[:100]}...")
+        logger.debug("Created message for step %d: %.100s...", i, actions_str)
+        yield user_message
+
+
+def history_to_llm_messages(history_data: Dict[str, Any]) -> List['BaseMessage']:
+    """
+    Convert history data to a list of LLM-compatible messages.
     
-    logger.info(f"Successfully converted {len(messages)} steps to LLM messages")
+    Args:
+        history_data: Loaded history data
+        
+    Returns:
+        List of BaseMessage objects ready to be sent to LLM (see iter_history_llm_messages)
+    """
+    logger.info("Converting history to LLM messages")
+    messages = list(iter_history_llm_messages(history_data))
+    logger.info("Successfully converted %d steps to LLM messages", len(messages))
     return messages
 
@@ -0,0 +1,105 @@
+"""
+JSON serialization helpers for the files read and written by the knowledge management scripts.
+
+Uses orjson when it is installed (several times faster than the stdlib for the indented
+output we write), and falls back to the stdlib json module otherwise.
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Files at least this large are parsed straight from a memory map instead of being read into memory first
+MMAP_THRESHOLD = 64 * 1024
+
+
+def dumps_json_bytes(data: Any, indent: bool = True) -> bytes:
+    """
+    Serialize data to UTF-8 JSON bytes
+
+    Args:
+        data: JSON-serializable data
+        indent: Indent with 2 spaces; when False, write compact JSON without any whitespace
+
+    Returns:
+        Encoded JSON document (non-ASCII characters kept as-is)
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps_json(data: Any) -> str:
+    """
+    Serialize data to an indented JSON string
+
+    Args:
+        data: JSON-serializable data
+
+    Returns:
+        JSON document (2-space indentation, non-ASCII characters kept as-is)
+    """
+    return dumps_json_bytes(data).decode('utf-8')
+
+
+def loads_json(content: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document
+
+    Args:
+        content: JSON text or UTF-8 bytes
+
+    Returns:
+        Parsed data
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def write_json_file(data: Any, file_path: Union[str, Path], indent: bool = True) -> None:
+    """
+    Write data as JSON to a file
+
+    Args:
+        data: JSON-serializable data
+        file_path: Destination file
+        indent: Indent with 2 spaces (see dumps_json_bytes)
+    """
+    with open(file_path, 'wb') as f:
+        f.write(dumps_json_bytes(data, indent=indent))
+
+
+def read_json_file(file_path: Union[str, Path]) -> Any:
+    """
+    Read and parse a JSON file
+
+    Args:
+        file_path: JSON file to read
+
+    Returns:
+        Parsed data
+    """
+    if not ORJSON_AVAILABLE:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return orjson.loads(view)
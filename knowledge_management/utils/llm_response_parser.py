@@ -1,10 +1,19 @@
 import json
+import logging
 import re
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 
+# Import relatif quand le module fait partie du package, direct quand il est lancé comme script
+try:
+    from .json_utils import loads_json
+except ImportError:
+    from json_utils import loads_json
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
 class ParsedLLMResponse:
     """Classe pour stocker la réponse parsée du LLM évaluateur"""
     navigation_graph: Dict[str, Any]
@@ -20,12 +29,62 @@ class ParsedLLMResponse:
 class LLMResponseParser:
     """Parser pour les réponses du LLM évaluateur"""
     
-    def __init__(self):
-        self.json_pattern = r'```json\s*(.*?)\s*```'
-        self.verdict_pattern = r'<verdict>\s*(.*?)\s*</verdict>'
-        self.guide_pattern = r'<guide>\s*(.*?)\s*</guide>'
-        self.failure_guide_pattern = r'<failure_guide>\s*(.*?)\s*</failure_guide>'
-        self.tuple_pattern = r'\([\'"]([^\'"]+)[\'"],\s*[\'"]([^\'"]+)[\'"],\s*[\'"]([^\'"]+)[\'"]\)'
+    # Patterns compilés une seule fois, partagés par toutes les instances
+    _TUPLE_RE = re.compile(r'\([\'"]([^\'"]+)[\'"],\s*[\'"]([^\'"]+)[\'"],\s*[\'"]([^\'"]+)[\'"]\)')
+    _FALLBACK_TUPLE_RE = re.compile(r'\(([^,]+),\s*([^,]+),\s*([^)]+)\)')
+    
+    # Sections de la réponse : (nom, balise ouvrante, balise fermante)
+    _SECTION_TAGS = (
+        ('json', '```json', '```'),
+        ('verdict', '<verdict>', '</verdict>'),
+        ('failure_guide', '<failure_guide>', '</failure_guide>'),
+    )
+    
+    def _scan_sections(self, response: str) -> Tuple[List[str], Optional[str], Optional[str]]:
+        """
+        Parcourt la réponse une seule fois, en cherchant les balises littérales avec str.find
+        
+        La section qui commence le plus tôt l'emporte et le parcours reprend après sa balise fermante,
+        comme avec une alternation de regex.
+        
+        Returns:
+            (contenu des deux premiers blocs ```json```, premier verdict, premier failure_guide)
+        """
+        sections: Dict[str, List[str]] = {name: [] for name, _, _ in self._SECTION_TAGS}
+        # Prochaine position de chaque balise ouvrante encore utile
+        next_open = {tag: response.find(tag[1]) for tag in self._SECTION_TAGS}
+        position = 0
+        
+        while next_open:
+            for tag in list(next_open):
+                if next_open[tag] == -1:
+                    del next_open[tag]
+                elif next_open[tag] < position:
+                    next_open[tag] = response.find(tag[1], position)
+                    if next_open[tag] == -1:
+                        del next_open[tag]
+            if not next_open:
+                break
+            
+            tag = min(next_open, key=next_open.get)
+            name, open_tag, close_tag = tag
+            content_start = next_open[tag] + len(open_tag)
+            content_end = response.find(close_tag, content_start)
+            if content_end == -1:
+                # Pas de balise fermante après celle-ci, donc après aucune des suivantes non plus
+                del next_open[tag]
+                continue
+            
+            sections[name].append(response[content_start:content_end].strip())
+            position = content_end + len(close_tag)
+            
+            # Tout ce qui est utilisé a été trouvé
+            if len(sections['json']) >= 2 and sections['verdict'] and sections['failure_guide']:
+                break
+        
+        verdict = sections['verdict'][0] if sections['verdict'] else None
+        failure_guide = sections['failure_guide'][0] if sections['failure_guide'] else None
+        return sections['json'][:2], verdict, failure_guide
     
     def parse(self, llm_response: str) -> ParsedLLMResponse:
         """
@@ -37,20 +96,22 @@ class LLMResponseParser:
         Returns:
             ParsedLLMResponse: Objet contenant les éléments parsés
         """
+        json_blocks, verdict_content, failure_guide_content = self._scan_sections(llm_response)
+        
         # Extraire le graph de navigation (JSON avant le verdict)
-        navigation_graph = self._extract_navigation_graph(llm_response)
+        navigation_graph = self._extract_navigation_graph(json_blocks)
         
         # Extraire le verdict
-        verdict = self._extract_verdict(llm_response)
+        verdict = self._extract_verdict(verdict_content)
         
         # Extraire le tuple du verdict
         task_label, website_url, task_title = self._extract_tuple_from_verdict(verdict)
         
         # Extraire le guide (JSON après le verdict)
-        guide = self._extract_guide(llm_response)
+        guide = self._extract_guide(json_blocks)
         
         # Extraire le failure_guide (optionnel)
-        failure_guide = self._extract_failure_guide(llm_response)
+        failure_guide = failure_guide_content or ""
         
         return ParsedLLMResponse(
             navigation_graph=navigation_graph,
@@ -63,38 +124,32 @@ class LLMResponseParser:
             task_title=task_title
         )
     
-    def _extract_navigation_graph(self, response: str) -> Dict[str, Any]:
+    def _extract_navigation_graph(self, json_blocks: List[str]) -> Dict[str, Any]:
         """Extrait le graph de navigation depuis le premier bloc ```json``` (avant le verdict)"""
-        # Trouver tous les blocs JSON
-        json_matches = list(re.finditer(self.json_pattern, response, re.DOTALL))
-        
-        if not json_matches:
+        if not json_blocks:
             raise ValueError("Aucun graph de navigation JSON trouvé dans la réponse")
         
         # Prendre le premier bloc JSON (avant le verdict)
-        first_json_match = json_matches[0]
-        json_content = first_json_match.group(1).strip()
+        json_content = json_blocks[0]
         
         try:
-            return json.loads(json_content)
+            return loads_json(json_content)
         except json.JSONDecodeError as e:
             raise ValueError(f"Erreur de parsing JSON du graph de navigation: {e}")
     
-    def _extract_verdict(self, response: str) -> str:
-        """Extrait le verdict depuis les balises <verdict></verdict>"""
-        match = re.search(self.verdict_pattern, response, re.DOTALL)
-        if not match:
+    def _extract_verdict(self, verdict_content: Optional[str]) -> str:
+        """Vérifie la présence du verdict trouvé entre les balises <verdict></verdict>"""
+        if verdict_content is None:
             raise ValueError("Aucun verdict trouvé dans la réponse")
         
-        return match.group(1).strip()
+        return verdict_content
     
     def _extract_tuple_from_verdict(self, verdict: str) -> Tuple[str, str, str]:
         """Extrait le tuple (LABEL, url, title) du verdict"""
-        match = re.search(self.tuple_pattern, verdict)
+        match = self._TUPLE_RE.search(verdict)
         if not match:
             # Fallback: try to extract with different quote styles
-            fallback_pattern = r'\(([^,]+),\s*([^,]+),\s*([^)]+)\)'
-            match = re.search(fallback_pattern, verdict)
+            match = self._FALLBACK_TUPLE_RE.search(verdict)
             if not match:
                 raise ValueError("Aucun tuple trouvé dans le verdict")
             
@@ -109,47 +164,22 @@ class LLMResponseParser:
         
         return task_label, website_url, task_title
     
-    def _determine_status(self, verdict: str) -> str:
-        """Détermine le status basé sur le contenu du verdict"""
-        verdict_upper = verdict.upper()
-        
-        if 'SUCCESS' in verdict_upper:
-            return 'SUCCESS'
-        elif 'FAILURE' in verdict_upper:
-            return 'FAILURE'
-        elif 'IMPOSSIBLE' in verdict_upper:
-            return 'IMPOSSIBLE'
-        else:
-            return 'UNKNOWN'
-    
-    def _extract_guide(self, response: str) -> Dict[str, Any]:
+    def _extract_guide(self, json_blocks: List[str]) -> Dict[str, Any]:
         """Extrait le guide depuis le deuxième bloc ```json``` (après le verdict)"""
-        # Trouver tous les blocs JSON
-        json_matches = list(re.finditer(self.json_pattern, response, re.DOTALL))
-        
-        if len(json_matches) < 2:
+        if len(json_blocks) < 2:
             # Si il n'y a qu'un seul JSON ou aucun, retourner un dictionnaire vide
             return {}
         
         # Prendre le deuxième bloc JSON (après le verdict)
-        second_json_match = json_matches[1]
-        json_content = second_json_match.group(1).strip()
+        json_content = json_blocks[1]
         
         try:
-            return json.loads(json_content)
+            return loads_json(json_content)
         except json.JSONDecodeError as e:
             # En cas d'erreur de parsing, retourner un dictionnaire vide
-            print(f"Warning: Erreur de parsing JSON du guide: {e}")
+            logger.warning("Erreur de parsing JSON du guide: %s", e)
             return {}
     
-    def _extract_failure_guide(self, response: str) -> str:
-        """Extrait le failure_guide depuis les balises <failure_guide></failure_guide>"""
-        match = re.search(self.failure_guide_pattern, response, re.DOTALL)
-        if not match:
-            return ""  # Le failure_guide peut être optionnel
-        
-        return match.group(1).strip()
-
 
 def parse_llm_evaluation_response(llm_response: str) -> ParsedLLMResponse:
     """
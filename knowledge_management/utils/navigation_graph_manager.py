@@ -7,65 +7,221 @@ Ce module permet de :
 3. Identifier les patterns de navigation utiles
 """
 
-import json
+import io
 import logging
 import os
+import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Final, Optional, Literal
+from collections import defaultdict
 from datetime import datetime, timedelta
-from urllib.parse import urlparse
+from functools import lru_cache
 
 from browser_use.llm import ChatAnthropic, ChatOpenAI
 from browser_use.llm.messages import SystemMessage, UserMessage
-from ..prompts.graph_aggregation_prompts import SYSTEM_PROMPT_PROMPT_AGGREGATION
+from ..prompts import graph_aggregation_prompts
+from .json_utils import dumps_json, loads_json, read_json_file, write_json_file
 
 logger = logging.getLogger(__name__)
 
+# Contexte renvoyé par build_navigation_context quand le site n'a aucun graph
+NO_NAVIGATION_CONTEXT: Final = "No previous navigation patterns available for this website."
+
+# Graph fusionné dans une réponse du LLM : bloc ```json```, ou à défaut tout ce qui va de la première à la dernière accolade
+_JSON_BLOCK_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_JSON_BARE_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _url_host(url: str) -> str:
+    """Hôte d'une URL, sans identifiants ni port"""
+    # Cas courant : http(s)://hote/chemin, sans port, identifiants, requête ni fragment dans l'hôte
+    if url.startswith('https://'):
+        host_start = 8
+    elif url.startswith('http://'):
+        host_start = 7
+    else:
+        host_start = -1
+    if host_start >= 0:
+        host_end = url.find('/', host_start)
+        host = url[host_start:host_end] if host_end >= 0 else url[host_start:]
+        if not ('?' in host or '#' in host or '@' in host or ':' in host):
+            return host
+    
+    # Cas général : retirer le schéma, puis tout ce qui suit l'hôte (chemin, requête, fragment)
+    host = url
+    scheme_end = host.find('://')
+    if scheme_end >= 0:
+        host = host[scheme_end + 3:]
+    for separator in '/?#':
+        separator_index = host.find(separator)
+        if separator_index >= 0:
+            host = host[:separator_index]
+    
+    # Retirer les identifiants et le port
+    host = host[host.rfind('@') + 1:]
+    port_index = host.rfind(':')
+    if port_index > host.rfind(']'):
+        host = host[:port_index]
+    return host
+
+
+@lru_cache(maxsize=1024)
+def _normalize_domain(url: str) -> str:
+    """Domaine principal d'une URL (ex: 'admin_microsoft' pour 'admin.microsoft.com'), calculé une fois par URL"""
+    host = _url_host(url.lower())
+    
+    # Ignorer www
+    if host.startswith('www.'):
+        host = host[4:]
+    
+    # Tout sauf le TLD (dernière partie), joint avec des underscores
+    parts = host.split('.')
+    if len(parts) > 1:
+        return '_'.join(parts[:-1])
+    return host
+
+
+# Taille maximale d'un graph injecté dans le contexte de navigation (au-delà, il est tronqué)
+MAX_GRAPH_CONTEXT_CHARS = 10000
+
+
+@lru_cache(maxsize=256)
+def _read_graph_file(file_path: str, mtime_ns: int, max_chars: Optional[int] = None) -> str:
+    """
+    Lit un fichier de graph, mis en cache par (chemin, mtime) pour détecter les fichiers modifiés
+    
+    Avec max_chars, seuls les max_chars + 1 premiers caractères sont lus : assez pour savoir si le contenu dépasse.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read(-1 if max_chars is None else max_chars + 1)
+
+
+def union_navigation_graphs(existing_graph: dict, new_graph: dict) -> dict:
+    """
+    Fusion déterministe (sans LLM) de deux graphs de navigation
+
+    Les pages sont l'union des deux graphs ; pour une page commune, les champs du nouveau graph
+    l'emportent, les éléments sont dédupliqués en gardant l'ordre et les liens sortants sont
+    dédupliqués par (target, action).
+    """
+    merged_graph = {}
+    # Union des pages en une passe, dans l'ordre d'apparition
+    for page in {**existing_graph, **new_graph}:
+        old_page = existing_graph.get(page)
+        new_page = new_graph.get(page)
+        if not isinstance(old_page, dict) or not isinstance(new_page, dict):
+            merged_graph[page] = new_page if new_page is not None else old_page
+            continue
+
+        merged_page = {**old_page, **new_page}
+        merged_page['elements'] = list(dict.fromkeys(old_page.get('elements', []) + new_page.get('elements', [])))
+
+        seen_links = set()
+        merged_links = []
+        for link in old_page.get('outgoing_links', []) + new_page.get('outgoing_links', []):
+            link_key = (link.get('target'), link.get('action'))
+            if link_key not in seen_links:
+                seen_links.add(link_key)
+                merged_links.append(link)
+        merged_page['outgoing_links'] = merged_links
+
+        merged_graph[page] = merged_page
+    return merged_graph
+
+
+# Champs propres à une session, absents des graphs fusionnés
+_SESSION_PAGE_FIELDS = ('elements', 'outgoing_links', 'visited_steps')
+
+
+def is_navigation_subgraph(existing_graph: dict, new_graph: dict) -> bool:
+    """
+    Indique si le nouveau graph n'apporte rien au graph existant (la fusion peut alors être évitée)
+
+    C'est le cas si chaque page du nouveau graph existe déjà avec les mêmes champs descriptifs,
+    et que ses éléments et ses liens sortants (par (target, action)) sont déjà présents.
+    Les visited_steps, propres à chaque session, sont ignorés.
+    """
+    for page, new_page in new_graph.items():
+        old_page = existing_graph.get(page)
+        if not isinstance(old_page, dict) or not isinstance(new_page, dict):
+            if old_page != new_page:
+                return False
+            continue
+
+        for field, value in new_page.items():
+            if field not in _SESSION_PAGE_FIELDS and old_page.get(field) != value:
+                return False
+
+        if not set(new_page.get('elements', [])) <= set(old_page.get('elements', [])):
+            return False
+
+        old_links = {(link.get('target'), link.get('action')) for link in old_page.get('outgoing_links', [])}
+        if any((link.get('target'), link.get('action')) not in old_links for link in new_page.get('outgoing_links', [])):
+            return False
+    return True
+
 
 class NavigationGraphManager:
     """Gestionnaire pour les graphs de navigation"""
     
-    def __init__(self, graphs_dir: Optional[Path] = None, llm_provider: Literal["anthropic", "openai"] = "anthropic"):
+    def __init__(
+        self,
+        graphs_dir: Optional[Path] = None,
+        llm_provider: Literal["anthropic", "openai"] = "anthropic",
+        use_llm_merge: bool = False,
+        pretty_json: bool = False,
+    ):
         """
         Initialise le gestionnaire de graphs de navigation
         
         Args:
             graphs_dir: Répertoire contenant les graphs de navigation
             llm_provider: Fournisseur de LLM ("anthropic" ou "openai")
+            use_llm_merge: Fusionner les graphs avec le LLM plutôt que par union déterministe (un appel LLM par graph sauvegardé)
+            pretty_json: Indenter les fichiers de graph (pour les lire à la main) ; compacts par défaut,
+                car leur contenu est injecté tel quel dans les prompts
         """
         if graphs_dir is None:
             graphs_dir = Path(__file__).parent.parent / "navigation_graphs"
         
         self.graphs_dir = graphs_dir
         self.graphs_dir.mkdir(exist_ok=True)
+        self.pretty_json = pretty_json
+        
+        # Index des fichiers de graph et cache domaine -> fichier, vidés à chaque nouveau graph
+        self._graph_files_index = lru_cache(maxsize=1)(self._scan_graph_files)
+        self._graph_token_index = lru_cache(maxsize=1)(self._build_graph_token_index)
+        self._find_graph_file_cached = lru_cache(maxsize=256)(self._find_graph_file_for_domain)
         
-        # Initialiser le LLM pour la fusion des graphs
+        # Initialiser le LLM pour la fusion des graphs, seulement si elle est demandée
+        self.use_llm_merge = use_llm_merge
         self.merge_llm = None
         
-        if llm_provider == "anthropic":
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if api_key:
-                self.merge_llm = ChatAnthropic(
-                    model="claude-sonnet-4-20250514",
-                    api_key=api_key,
-                    max_tokens=4000,
-                    temperature=0.1
-                )
-            else:
-                logger.warning("⚠️ ANTHROPIC_API_KEY non défini, la fusion des graphs sera désactivée")
-        elif llm_provider == "openai":
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key:
-                self.merge_llm = ChatOpenAI(
-                    model="gpt-4o",
-                    api_key=api_key,
-                    max_tokens=4000,
-                    temperature=0.1
-                )
+        if use_llm_merge:
+            if llm_provider == "anthropic":
+                api_key = os.getenv('ANTHROPIC_API_KEY')
+                if api_key:
+                    self.merge_llm = ChatAnthropic(
+                        model="claude-sonnet-4-20250514",
+                        api_key=api_key,
+                        max_tokens=4000,
+                        temperature=0.1
+                    )
+                else:
+                    logger.warning("⚠️ ANTHROPIC_API_KEY non défini, la fusion des graphs sera désactivée")
+            elif llm_provider == "openai":
+                api_key = os.getenv('OPENAI_API_KEY')
+                if api_key:
+                    self.merge_llm = ChatOpenAI(
+                        model="gpt-4o",
+                        api_key=api_key,
+                        max_tokens=4000,
+                        temperature=0.1
+                    )
+                else:
+                    logger.warning("⚠️ OPENAI_API_KEY non défini, la fusion des graphs sera désactivée")
             else:
-                logger.warning("⚠️ OPENAI_API_KEY non défini, la fusion des graphs sera désactivée")
-        else:
-            logger.warning(f"⚠️ Fournisseur LLM non reconnu: {llm_provider}, la fusion des graphs sera désactivée")
+                logger.warning(f"⚠️ Fournisseur LLM non reconnu: {llm_provider}, la fusion des graphs sera désactivée")
         
         logger.info(f"🗺️ Navigation Graph Manager initialisé: {self.graphs_dir} avec {llm_provider}")
     
@@ -79,45 +235,49 @@ class NavigationGraphManager:
         Returns:
             Domaine principal (ex: 'admin_microsoft' pour 'admin.microsoft.com')
         """
-        try:
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.lower()
-            
-            # Ignorer www
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            
-            # Séparer par les points
-            parts = domain.split('.')
-            
-            # Prendre tout sauf le TLD (dernière partie)
-            if len(parts) > 1:
-                # Tout sauf le dernier élément (TLD)
-                domain_parts = parts[:-1]
-                # Joindre avec des underscores
-                return '_'.join(domain_parts)
-            else:
-                return domain
-                
-        except:
-            # Fallback: essayer d'extraire manuellement
-            url_lower = url.lower()
-            if '://' in url_lower:
-                url_lower = url_lower.split('://')[1]
-            if '/' in url_lower:
-                url_lower = url_lower.split('/')[0]
-            
-            # Ignorer www
-            if url_lower.startswith('www.'):
-                url_lower = url_lower[4:]
-            
-            # Séparer par les points
-            parts = url_lower.split('.')
-            if len(parts) > 1:
-                domain_parts = parts[:-1]
-                return '_'.join(domain_parts)
-            else:
-                return url_lower
+        return _normalize_domain(url)
+    
+    def _scan_graph_files(self) -> Dict[str, Path]:
+        """
+        Parcourt une seule fois le répertoire des graphs
+        
+        Returns:
+            Dictionnaire nom de fichier sans extension -> chemin, dans l'ordre du répertoire
+        """
+        with os.scandir(self.graphs_dir) as entries:
+            return {
+                entry.name[:-len('.json')]: Path(entry.path)
+                for entry in entries
+                if entry.name.endswith('_graph.json') and entry.is_file()
+            }
+    
+    def _build_graph_token_index(self) -> Dict[str, List[Path]]:
+        """
+        Index inversé des fichiers de graph par composant de domaine
+        
+        Returns:
+            Dictionnaire composant (ex: 'airbnb' pour 'airbnb_graph') -> chemins, dans l'ordre du répertoire
+        """
+        token_index = defaultdict(list)
+        for filename, graph_file in self._graph_files_index().items():
+            for token in filename[:-len('_graph')].split('_'):
+                token_index[token].append(graph_file)
+        return dict(token_index)
+    
+    def list_graph_files(self) -> List[Path]:
+        """
+        Liste les fichiers de graph de navigation (depuis l'index en mémoire)
+        
+        Returns:
+            Chemins des fichiers de graph
+        """
+        return list(self._graph_files_index().values())
+    
+    def _invalidate_graph_caches(self):
+        """Vide l'index des fichiers et le cache des recherches par domaine"""
+        self._graph_files_index.cache_clear()
+        self._graph_token_index.cache_clear()
+        self._find_graph_file_cached.cache_clear()
     
     def _find_graph_file_by_domain(self, website_url: str) -> Optional[Path]:
         """
@@ -130,13 +290,39 @@ class NavigationGraphManager:
             Chemin du fichier de graph trouvé ou None
         """
         try:
-            target_domain = self._extract_domain(website_url)
+            return self._find_graph_file_cached(self._extract_domain(website_url))
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la recherche de graph: {e}")
+            return None
+    
+    def _find_graph_file_for_domain(self, target_domain: str) -> Optional[Path]:
+        """
+        Cherche le fichier de graph d'un domaine normalisé (résultat mis en cache par domaine)
+        
+        Args:
+            target_domain: Domaine normalisé (voir _extract_domain)
+            
+        Returns:
+            Chemin du fichier de graph trouvé ou None
+        """
+        try:
             logger.info(f"🔍 Recherche de graph pour le domaine: {target_domain}")
             
-            # Chercher dans tous les fichiers de graph
-            for graph_file in self.graphs_dir.glob("*_graph.json"):
-                filename = graph_file.stem  # Nom sans extension
-                
+            graph_files = self._graph_files_index()
+            
+            # Cas courant : le fichier porte exactement le nom du domaine
+            exact_match = graph_files.get(f"{target_domain}_graph")
+            if exact_match is not None:
+                logger.info(f"✅ Graph trouvé: {exact_match.name}")
+                return exact_match
+            
+            # Domaine principal (première partie), pour la recherche flexible
+            main_domain = target_domain.split('_')[0] if '_' in target_domain else target_domain
+            
+            # Un seul parcours des fichiers : la première correspondance directe ou inverse l'emporte,
+            # sinon on retient la première correspondance flexible
+            flexible_match = None
+            for filename, graph_file in graph_files.items():
                 # Vérifier si le domaine cible est contenu dans le nom de fichier
                 if target_domain in filename:
                     logger.info(f"✅ Graph trouvé: {graph_file.name}")
@@ -147,18 +333,19 @@ class NavigationGraphManager:
                 if filename in target_domain:
                     logger.info(f"✅ Graph trouvé (correspondance inverse): {graph_file.name}")
                     return graph_file
-            
-            # Si pas trouvé, essayer une recherche plus flexible
-            # Extraire le domaine principal (première partie)
-            main_domain = target_domain.split('_')[0] if '_' in target_domain else target_domain
-            
-            for graph_file in self.graphs_dir.glob("*_graph.json"):
-                filename = graph_file.stem
                 
                 # Vérifier si le domaine principal est dans le nom de fichier
-                if main_domain in filename:
-                    logger.info(f"✅ Graph trouvé (recherche flexible): {graph_file.name}")
-                    return graph_file
+                if flexible_match is None and main_domain in filename:
+                    flexible_match = graph_file
+            
+            # Recherche flexible : d'abord les fichiers dont un composant est exactement le domaine principal
+            token_matches = self._graph_token_index().get(main_domain)
+            if token_matches:
+                flexible_match = token_matches[0]
+            
+            if flexible_match is not None:
+                logger.info(f"✅ Graph trouvé (recherche flexible): {flexible_match.name}")
+                return flexible_match
             
             logger.info(f"❌ Aucun graph trouvé pour le domaine: {target_domain}")
             return None
@@ -167,13 +354,20 @@ class NavigationGraphManager:
             logger.error(f"❌ Erreur lors de la recherche de graph: {e}")
             return None
     
-    def find_navigation_graphs_for_website(self, website_url: str, max_age_days: int = 30) -> List[Dict[str, Any]]:
+    def find_navigation_graphs_for_website(
+        self,
+        website_url: str,
+        max_age_days: int = 30,
+        max_content_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Trouve les graphs de navigation pour un site web donné
         
         Args:
             website_url: URL du site web
             max_age_days: Âge maximum des graphs à considérer (en jours)
+            max_content_chars: Ne lire que le début des fichiers (max_content_chars + 1 caractères, pour que
+                build_navigation_context sache s'il doit tronquer) ; None lit le graph complet
             
         Returns:
             Liste des graphs de navigation avec leurs métadonnées
@@ -185,17 +379,21 @@ class NavigationGraphManager:
             # Chercher le fichier correspondant à l'URL
             target_filepath = self._find_graph_file_by_domain(website_url)
             
-            if target_filepath and target_filepath.exists():
+            # Un seul stat : existence, âge et version du fichier pour le cache de lecture
+            file_stat = None
+            if target_filepath:
+                try:
+                    file_stat = os.stat(target_filepath)
+                except FileNotFoundError:
+                    pass
+            
+            if file_stat is not None:
                 try:
                     # Vérifier l'âge du fichier
-                    file_time = datetime.fromtimestamp(target_filepath.stat().st_mtime)
+                    file_time = datetime.fromtimestamp(file_stat.st_mtime)
                     if file_time >= cutoff_date:
-                        # Charger le contenu en texte brut
-                        with open(target_filepath, 'r', encoding='utf-8') as f:
-                            graph_content = f.read()
-                        
-                        # Extraire les métadonnées du nom de fichier
-                        filename = target_filepath.stem
+                        # Charger le contenu en texte brut (relu seulement si le fichier a changé)
+                        graph_content = _read_graph_file(str(target_filepath), file_stat.st_mtime_ns, max_content_chars)
                         
                         graphs.append({
                             'file_path': str(target_filepath),
@@ -217,6 +415,21 @@ class NavigationGraphManager:
             logger.error(f"❌ Erreur lors de la recherche de graphs: {e}")
             return []
     
+    def match_urls(self, urls: List[str], max_age_days: int = 30) -> List[List[Dict[str, Any]]]:
+        """
+        Trouve les graphs de navigation pour plusieurs URLs en une fois
+        
+        Args:
+            urls: URLs des sites web
+            max_age_days: Âge maximum des graphs à considérer (en jours)
+            
+        Returns:
+            Pour chaque URL (dans le même ordre), la liste de ses graphs de navigation
+        """
+        # Un seul parcours du répertoire pour tout le lot, chaque domaine n'est résolu qu'une fois
+        self._graph_files_index()
+        return [self.find_navigation_graphs_for_website(url, max_age_days) for url in urls]
+    
     def build_navigation_context(self, graphs: List[Dict[str, Any]], max_graphs: int = 3) -> str:
         """
         Construit un contexte de navigation à partir des graphs
@@ -229,27 +442,27 @@ class NavigationGraphManager:
             Contexte formaté pour injection dans le prompt
         """
         if not graphs:
-            return "No previous navigation patterns available for this website."
+            return NO_NAVIGATION_CONTEXT
         
         # Limiter le nombre de graphs
         graphs = graphs[:max_graphs]
         
-        context_parts = [
-            "## Navigation graph of this website:\n"
-        ]
+        context = io.StringIO()
+        context.write("## Navigation graph of this website:\n")
         
-        for i, graph_info in enumerate(graphs, 1):
+        for graph_info in graphs:
             # Utiliser le contenu brut du graph
             graph_content = graph_info['graph_content']
+            context.write("\n")
             
             # Limiter la taille du contenu pour éviter des prompts trop longs
-            if len(graph_content) > 10000:
-                graph_content = graph_content[:10000] + "...\n[Content truncated for brevity]"
-            
-            # Ajouter le contenu du graph
-            context_parts.append(graph_content)
+            if len(graph_content) > MAX_GRAPH_CONTEXT_CHARS:
+                context.write(graph_content[:MAX_GRAPH_CONTEXT_CHARS])
+                context.write("...\n[Content truncated for brevity]")
+            else:
+                context.write(graph_content)
         
-        return "\n".join(context_parts)
+        return context.getvalue()
     
     async def save_navigation_graph(self, navigation_graph: dict, website_url: str) -> bool:
         """
@@ -275,23 +488,28 @@ class NavigationGraphManager:
                 logger.info(f"🔄 Graph existant trouvé, fusion en cours...")
                 
                 # Charger le graph existant
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    existing_graph = json.load(f)
+                existing_graph = read_json_file(filepath)
                 
-                # Fusionner les graphs avec LLM
+                # Fusionner les graphs
                 merged_graph = await self._merge_navigation_graphs(existing_graph, navigation_graph)
                 
+                # Fichier inchangé : pas de réécriture
+                if merged_graph == existing_graph:
+                    logger.info(f"⏭️ Graph de navigation inchangé, pas de réécriture : {filepath}")
+                    return True
+                
                 # Sauvegarder le graph fusionné
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(merged_graph, f, indent=2, ensure_ascii=False)
+                write_json_file(merged_graph, filepath, indent=self.pretty_json)
                 
                 logger.info(f"✅ Graph de navigation fusionné et sauvegardé : {filepath}")
             else:
                 # Premier graph pour ce domaine
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(navigation_graph, f, indent=2, ensure_ascii=False)
+                write_json_file(navigation_graph, filepath, indent=self.pretty_json)
                 
                 logger.info(f"📊 Nouveau graph de navigation sauvegardé : {filepath}")
+                
+                # Un nouveau fichier peut changer le résultat des recherches par domaine
+                self._invalidate_graph_caches()
             
             return True
             
@@ -301,7 +519,7 @@ class NavigationGraphManager:
     
     async def _merge_navigation_graphs(self, existing_graph: dict, new_graph: dict) -> dict:
         """
-        Fusionne deux graphs de navigation en utilisant le LLM
+        Fusionne deux graphs de navigation, avec le LLM si use_llm_merge, par union déterministe sinon
         
         Args:
             existing_graph: Graph existant
@@ -311,35 +529,42 @@ class NavigationGraphManager:
             Graph fusionné
         """
         try:
-            # Vérifier si le LLM est disponible
+            # Rien à fusionner si le nouveau graph est déjà contenu dans l'existant
+            if is_navigation_subgraph(existing_graph, new_graph):
+                logger.info("⏭️ Nouveau graph déjà contenu dans le graph existant, fusion ignorée")
+                return existing_graph
+            
+            # Vérifier si le LLM est demandé et disponible
             if not self.merge_llm:
-                logger.warning("⚠️ LLM non disponible, utilisation du nouveau graph uniquement")
-                return new_graph
+                if self.use_llm_merge:
+                    logger.warning("⚠️ LLM non disponible, fusion déterministe des graphs")
+                return union_navigation_graphs(existing_graph, new_graph)
             
             # Préparer les données pour le LLM
-            existing_graph_str = json.dumps(existing_graph, indent=2, ensure_ascii=False)
-            new_graph_str = json.dumps(new_graph, indent=2, ensure_ascii=False)
+            existing_graph_str = dumps_json(existing_graph)
+            new_graph_str = dumps_json(new_graph)
             
-            # Créer le prompt pour la fusion
-            user_prompt = f"""## Existing Navigation Graph:
+            # Créer le prompt pour la fusion, en deux parties : le graph existant, réutilisé à chaque
+            # mise à jour du domaine, puis le nouveau graph
+            existing_graph_prompt = f"""## Existing Navigation Graph:
 ```json
 {existing_graph_str}
-```
-
-## New Navigation Graph to Merge:
+```"""
+            new_graph_prompt = f"""## New Navigation Graph to Merge:
 ```json
 {new_graph_str}
 ```
 
 Please merge these two navigation graphs into a single, unified and exhaustive graph. Follow the instructions in the system prompt."""
             
-            # Créer les messages
-            system_message = SystemMessage(content=SYSTEM_PROMPT_PROMPT_AGGREGATION)
-            user_message = UserMessage(content=user_prompt)
+            # Créer les messages, le prompt système et le graph existant forment un préfixe mis en cache
+            system_message = SystemMessage(content=graph_aggregation_prompts.SYSTEM_PROMPT_PROMPT_AGGREGATION, cache=True)
+            existing_graph_message = UserMessage(content=existing_graph_prompt, cache=True)
+            new_graph_message = UserMessage(content=new_graph_prompt)
             
             # Appeler le LLM
             logger.info("🤖 Fusion des graphs de navigation avec LLM...")
-            response = await self.merge_llm.ainvoke([system_message, user_message])
+            response = await self.merge_llm.ainvoke([system_message, existing_graph_message, new_graph_message])
             
             # Extraire le graph fusionné de la réponse
             merged_graph = self._extract_merged_graph_from_response(response.completion)
@@ -349,8 +574,13 @@ Please merge these two navigation graphs into a single, unified and exhaustive g
             
         except Exception as e:
             logger.error(f"❌ Erreur lors de la fusion des graphs : {e}")
-            # En cas d'erreur, retourner le nouveau graph
-            return new_graph
+            # En cas d'erreur, fusion déterministe plutôt que de perdre le graph existant ; si c'est l'union
+            # elle-même qui échoue (graph malformé), le graph existant est conservé tel quel
+            try:
+                return union_navigation_graphs(existing_graph, new_graph)
+            except Exception as union_error:
+                logger.error(f"❌ Fusion déterministe impossible, graph existant conservé : {union_error}")
+                return existing_graph
     
     def _extract_merged_graph_from_response(self, response: str) -> dict:
         """
@@ -364,25 +594,35 @@ Please merge these two navigation graphs into a single, unified and exhaustive g
         """
         try:
             # Chercher le bloc JSON dans la réponse
-            import re
-            json_pattern = r'```json\s*(.*?)\s*```'
-            match = re.search(json_pattern, response, re.DOTALL)
+            match = _JSON_BLOCK_RE.search(response)
             
             if match:
                 json_content = match.group(1).strip()
-                return json.loads(json_content)
+                return loads_json(json_content)
             else:
                 # Essayer de trouver du JSON sans les balises
-                json_pattern_no_tags = r'\{.*\}'
-                match = re.search(json_pattern_no_tags, response, re.DOTALL)
+                match = _JSON_BARE_RE.search(response)
                 
                 if match:
                     json_content = match.group(0)
-                    return json.loads(json_content)
+                    return loads_json(json_content)
                 else:
                     raise ValueError("Aucun JSON trouvé dans la réponse du LLM")
                     
         except Exception as e:
             logger.error(f"❌ Erreur lors de l'extraction du graph fusionné : {e}")
             raise
-    
\ No newline at end of file
+    
+
+
+@lru_cache(maxsize=None)
+def get_navigation_graph_manager(
+    llm_provider: Literal["anthropic", "openai"] = "anthropic",
+    use_llm_merge: bool = False,
+) -> NavigationGraphManager:
+    """
+    Gestionnaire de graphs partagé par tout le processus, un par configuration
+
+    Le client LLM et les caches d'index des fichiers de graphs ne sont ainsi créés qu'une fois.
+    """
+    return NavigationGraphManager(llm_provider=llm_provider, use_llm_merge=use_llm_merge)
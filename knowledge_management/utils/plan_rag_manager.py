@@ -7,10 +7,15 @@ This module allows to:
 3. Retrieve the most relevant plans for a new task
 """
 
+import hashlib
+import importlib.util
 import json
 import logging
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -21,6 +26,16 @@ from chromadb.config import Settings
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Number of recent find_similar_plans searches whose results are kept
+SIMILAR_PLANS_CACHE_SIZE = 256
+# Opt-in ONNX Runtime backend (needs optimum[onnxruntime]): quantized export shipped with the model,
+# chosen for the CPU it runs on, e.g. 'onnx/model_qint8_avx512_vnni.onnx'. Its embeddings differ from
+# the default fp32 model, so the plans it embeds are kept in a collection of their own.
+ONNX_EMBEDDING_MODEL_FILE = os.getenv('PLAN_RAG_ONNX_MODEL_FILE') or None
+PLANS_COLLECTION_NAME = "successful_plans_onnx" if ONNX_EMBEDDING_MODEL_FILE else "successful_plans"
+
 
 class PlanRAGManager:
     """RAG Manager for successful plans"""
@@ -38,22 +53,75 @@ class PlanRAGManager:
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(exist_ok=True)
         
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Query embeddings by task title, repeated searches skip the model
+        self._embed_query_cached = lru_cache(maxsize=256)(self._embed_query)
         
-        # Initialize ChromaDB
-        self.chroma_client = chromadb.PersistentClient(
+        # Recent searches: (task_title, top_k) -> similar plans, cleared on writes
+        # (locked: searches also run in asyncio.to_thread workers)
+        self._similar_plans_cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._similar_plans_cache_lock = threading.Lock()
+        
+        # The embedding model and ChromaDB are loaded on first use (see the properties below)
+        logger.info(f"📚 RAG Manager initialized with storage: {self.storage_dir}")
+    
+    @cached_property
+    def embedding_model(self) -> SentenceTransformer:
+        """Embedding model, only loaded when plans are embedded (storing or searching)"""
+        if ONNX_EMBEDDING_MODEL_FILE:
+            # No silent fallback: fp32 embeddings must not end up in the ONNX collection
+            if importlib.util.find_spec('optimum') is None:
+                raise ImportError("PLAN_RAG_ONNX_MODEL_FILE is set but optimum[onnxruntime] is not installed")
+            return SentenceTransformer(
+                EMBEDDING_MODEL_NAME,
+                backend='onnx',
+                model_kwargs={'file_name': ONNX_EMBEDDING_MODEL_FILE}
+            )
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    
+    @cached_property
+    def chroma_client(self) -> chromadb.ClientAPI:
+        """ChromaDB client, opened on first access to the plans collection"""
+        return chromadb.PersistentClient(
             path=str(self.storage_dir / "chroma_db"),
             settings=Settings(anonymized_telemetry=False)
         )
-        
-        # Collection for plans
-        self.plans_collection = self.chroma_client.get_or_create_collection(
-            name="successful_plans",
+    
+    @cached_property
+    def plans_collection(self) -> chromadb.Collection:
+        """Collection for plans"""
+        return self.chroma_client.get_or_create_collection(
+            name=PLANS_COLLECTION_NAME,
             metadata={"hnsw:space": "cosine"}
         )
-        
-        logger.info(f"📚 RAG Manager initialized with storage: {self.storage_dir}")
+    
+    def _embed_query(self, task_title: str) -> Tuple[float, ...]:
+        """Embed a search query (immutable, so it can be cached and shared)"""
+        return tuple(self.embedding_model.encode(task_title).tolist())
+    
+    def _lookup_similar_plans(self, task_title: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Copy of the plans found by a previous search for the same title and top_k"""
+        with self._similar_plans_cache_lock:
+            cached = self._similar_plans_cache.get((task_title, top_k))
+            if cached is None:
+                return None
+            self._similar_plans_cache.move_to_end((task_title, top_k))
+        return [dict(plan) for plan in cached]
+    
+    def _remember_similar_plans(self, task_title: str, top_k: int, similar_plans: List[Dict[str, Any]]) -> None:
+        with self._similar_plans_cache_lock:
+            self._similar_plans_cache[(task_title, top_k)] = [dict(plan) for plan in similar_plans]
+            if len(self._similar_plans_cache) > SIMILAR_PLANS_CACHE_SIZE:
+                self._similar_plans_cache.popitem(last=False)
+    
+    def _clear_similar_plans_cache(self) -> None:
+        with self._similar_plans_cache_lock:
+            self._similar_plans_cache.clear()
+    
+    @staticmethod
+    def _plan_fingerprint(task_title: str, plan: str) -> str:
+        """Stable id of a plan, derived from its title and content"""
+        digest = hashlib.blake2b(f"{task_title}\x00{plan}".encode('utf-8'), digest_size=16).hexdigest()
+        return f"plan_{digest}"
     
     def _create_plan_document(self, task_title: str, plan: str, 
                              task_id: str, execution_date: str) -> Dict[str, Any]:
@@ -92,51 +160,73 @@ class PlanRAGManager:
             logger.warning("⚠️ No plans to store")
             return True
         
-        success_count = 0
-        total_count = len(plans_dict)
-        
         try:
             execution_date = datetime.now().isoformat()
             
-            for task_title, plan_content in plans_dict.items():
+            documents = [
+                self._create_plan_document(task_title, plan_content, task_id, execution_date)
+                for task_title, plan_content in plans_dict.items()
+            ]
+            
+            # Ids are content fingerprints: plans already stored are skipped (not re-embedded nor re-inserted)
+            ids = [self._plan_fingerprint(document["task_title"], document["plan"]) for document in documents]
+            existing_ids = set(self.plans_collection.get(ids=ids, include=[])['ids'])
+            if existing_ids:
+                new_indices = [i for i, plan_id in enumerate(ids) if plan_id not in existing_ids]
+                logger.info(f"⏭️ {len(ids) - len(new_indices)} plans already stored, skipped")
+                if not new_indices:
+                    return True
+                documents = [documents[i] for i in new_indices]
+                ids = [ids[i] for i in new_indices]
+            
+            # Generate all embeddings from task_titles in a single batched forward pass
+            texts = [document["text_for_embedding"] for document in documents]
+            embeddings = self.embedding_model.encode(texts)
+            
+            metadatas = [{
+                "task_title": document["task_title"],
+                "plan": document["plan"],
+                "task_id": task_id,
+                "execution_date": execution_date
+            } for document in documents]
+            
+            # Store in ChromaDB with a single insert
+            try:
+                self.plans_collection.add(
+                    embeddings=embeddings.tolist(),
+                    documents=texts,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                # New plans can change the results of any search
+                self._clear_similar_plans_cache()
+                logger.info(f"✅ All {len(documents)} plans stored successfully")
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ Batch insert failed ({e}), storing plans one by one")
+            
+            # Fallback: store plans individually so one invalid plan does not drop the others
+            success_count = 0
+            total_count = len(documents)
+            for i, document in enumerate(documents):
                 try:
-                    # Create document for this plan
-                    document = self._create_plan_document(
-                        task_title, plan_content, task_id, execution_date
-                    )
-                    
-                    # Generate embedding from task_title
-                    embedding = self.embedding_model.encode(document["text_for_embedding"])
-                    
-                    # Store in ChromaDB
                     self.plans_collection.add(
-                        embeddings=[embedding.tolist()],
-                        documents=[document["text_for_embedding"]],
-                        metadatas=[{
-                            "task_title": task_title,
-                            "plan": plan_content,
-                            "task_id": task_id,
-                            "execution_date": execution_date
-                        }],
-                        ids=[f"plan_{task_id}_{task_title}_{datetime.now().timestamp()}"]
+                        embeddings=[embeddings[i].tolist()],
+                        documents=[texts[i]],
+                        metadatas=[metadatas[i]],
+                        ids=[ids[i]]
                     )
-                    
                     success_count += 1
-                    logger.info(f"💾 Plan stored in RAG: {task_title}")
-                    
+                    logger.info(f"💾 Plan stored in RAG: {document['task_title']}")
                 except Exception as e:
-                    logger.error(f"❌ Error storing plan '{task_title}': {e}")
-                    continue
+                    logger.error(f"❌ Error storing plan '{document['task_title']}': {e}")
             
-            if success_count == total_count:
-                logger.info(f"✅ All {total_count} plans stored successfully")
-                return True
-            elif success_count > 0:
+            if success_count > 0:
+                self._clear_similar_plans_cache()
                 logger.warning(f"⚠️ {success_count}/{total_count} plans stored successfully")
                 return True
-            else:
-                logger.error(f"❌ Failed to store any of the {total_count} plans")
-                return False
+            logger.error(f"❌ Failed to store any of the {total_count} plans")
+            return False
                 
         except Exception as e:
             logger.error(f"❌ Error in store_successful_plan: {e}")
@@ -155,26 +245,24 @@ class PlanRAGManager:
         """
         try:
             logger.info(f"🔍 Searching similar plans for: {task_title}")
-            # Generate embedding from task_title directly
-            query_embedding = self.embedding_model.encode(task_title)
+            # Reuse the results of a previous search for the same title
+            cached_plans = self._lookup_similar_plans(task_title, top_k)
+            if cached_plans is not None:
+                logger.info(f"🔍 Reusing {len(cached_plans)} cached similar plans for {task_title}")
+                return cached_plans
+            
+            # Generate embedding from task_title directly (cached per title)
+            query_embedding = self._embed_query_cached(task_title)
             
             # Search in ChromaDB
             results = self.plans_collection.query(
-                query_embeddings=[query_embedding.tolist()],
+                query_embeddings=[list(query_embedding)],
                 n_results=top_k
             )
             
             # Format results
-            similar_plans = []
-            if results['metadatas'] and results['metadatas'][0]:
-                for i, metadata in enumerate(results['metadatas'][0]):
-                    similar_plans.append({
-                        "task_title": metadata["task_title"],
-                        "plan": metadata["plan"],
-                        "task_id": metadata["task_id"],
-                        "execution_date": metadata["execution_date"],
-                        "similarity_score": results['distances'][0][i] if results['distances'] else None
-                    })
+            similar_plans = self._format_query_results(results, 0)
+            self._remember_similar_plans(task_title, top_k, similar_plans)
             
             logger.info(f"🔍 Found {len(similar_plans)} similar plans for {task_title}")
             return similar_plans
@@ -183,6 +271,53 @@ class PlanRAGManager:
             logger.error(f"❌ Error searching for similar plans: {e}")
             return []
     
+    def find_similar_plans_batch(self, task_titles: List[str], top_k: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        Find similar plans for several tasks at once
+        
+        All titles are embedded in one forward pass and searched with a single ChromaDB query.
+        
+        Args:
+            task_titles: Titles of the tasks (embedded as-is)
+            top_k: Number of plans to return per task
+            
+        Returns:
+            For each title, in order, the list of similar plans (see find_similar_plans)
+        """
+        if not task_titles:
+            return []
+        
+        try:
+            logger.info(f"🔍 Searching similar plans for {len(task_titles)} tasks")
+            query_embeddings = self.embedding_model.encode(task_titles)
+            
+            results = self.plans_collection.query(
+                query_embeddings=query_embeddings.tolist(),
+                n_results=top_k
+            )
+            
+            return [self._format_query_results(results, i) for i in range(len(task_titles))]
+            
+        except Exception as e:
+            logger.error(f"❌ Error searching for similar plans: {e}")
+            return [[] for _ in task_titles]
+    
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any], query_index: int) -> List[Dict[str, Any]]:
+        """Format the plans found for one of the query embeddings of a ChromaDB query"""
+        similar_plans = []
+        if results['metadatas'] and results['metadatas'][query_index]:
+            distances = results['distances'][query_index] if results['distances'] else None
+            for i, metadata in enumerate(results['metadatas'][query_index]):
+                similar_plans.append({
+                    "task_title": metadata["task_title"],
+                    "plan": metadata["plan"],
+                    "task_id": metadata["task_id"],
+                    "execution_date": metadata["execution_date"],
+                    "similarity_score": distances[i] if distances else None
+                })
+        return similar_plans
+    
     def build_context_from_similar_plans(self, similar_plans: List[Dict[str, Any]]) -> str:
         """
         Build context from similar plans
@@ -225,8 +360,8 @@ class PlanRAGManager:
         try:
             count = self.plans_collection.count()
             
-            # Get all plans for statistics
-            all_plans = self.plans_collection.get()
+            # Get the metadata of all plans for statistics (no embeddings or documents)
+            all_plans = self.plans_collection.get(include=["metadatas"])
             
             task_titles = set()
             if all_plans['metadatas']:
@@ -251,12 +386,13 @@ class PlanRAGManager:
             True if cleanup was successful
         """
         try:
-            # Get all IDs to delete them
-            results = self.plans_collection.get()
-            if results['ids']:
-                # Delete all elements by their IDs
-                self.plans_collection.delete(ids=results['ids'])
-                logger.info(f"🗑️ {len(results['ids'])} RAG plans have been deleted")
+            # Only the ids are read (no documents, metadata or embeddings). The collection is emptied in place
+            # rather than dropped, so other managers on the same storage keep a valid handle to it
+            plan_ids = self.plans_collection.get(include=[])['ids']
+            if plan_ids:
+                self.plans_collection.delete(ids=plan_ids)
+                self._clear_similar_plans_cache()
+                logger.info(f"🗑️ {len(plan_ids)} RAG plans have been deleted")
             else:
                 logger.info("🗑️ No plans to delete")
             return True
@@ -277,6 +413,7 @@ class PlanRAGManager:
         try:
             # Delete plans with this title
             self.plans_collection.delete(where={"task_title": task_title})
+            self._clear_similar_plans_cache()
             logger.info(f"🗑️ Plans deleted for task: {task_title}")
             return True
         except Exception as e:
@@ -291,8 +428,8 @@ class PlanRAGManager:
             List of all plans with their metadata
         """
         try:
-            # Get all plans
-            results = self.plans_collection.get()
+            # Get the metadata of all plans
+            results = self.plans_collection.get(include=["metadatas"])
             
             plans = []
             if results['metadatas']:
@@ -307,4 +444,15 @@ class PlanRAGManager:
             return plans
         except Exception as e:
             logger.error(f"❌ Error retrieving plans: {e}")
-            return [] 
\ No newline at end of file
+            return [] 
+
+
+@lru_cache(maxsize=None)
+def get_plan_rag_manager() -> PlanRAGManager:
+    """
+    Return the process-wide RAG manager (default storage)
+
+    The embedding model and the ChromaDB client are loaded once per process
+    instead of once per caller.
+    """
+    return PlanRAGManager()
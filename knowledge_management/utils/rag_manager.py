@@ -14,102 +14,134 @@ logger = logging.getLogger(__name__)
 # Ajouter le chemin du projet
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.plan_rag_manager import PlanRAGManager
+def _get_rag_manager():
+    """Gestionnaire RAG, importé seulement par les commandes qui en ont besoin (sentence-transformers est long à charger)"""
+    from utils.plan_rag_manager import get_plan_rag_manager
+    return get_plan_rag_manager()
+
+
+def print_usage():
+    print("Usage: python rag_manager.py <command> [options]")
+    print("\nCommandes disponibles:")
+    print("  list                    - Lister tous les plans")
+    print("  stats                   - Afficher les statistiques")
+    print("  clear                   - Supprimer tous les plans")
+    print("  delete-website <url>    - Supprimer les plans d'un site")
+    print("  delete-task <title>     - Supprimer les plans d'une tâche")
+    print("  test-domain <url>       - Tester l'extraction de domaine")
+
+
+def cmd_list(args):
+    rag_manager = _get_rag_manager()
+    print("📋 Liste de tous les plans RAG:")
+    print("=" * 50)
+    plans = rag_manager.list_all_plans()
+    
+    if not plans:
+        print("Aucun plan trouvé.")
+    else:
+        for i, plan in enumerate(plans, 1):
+            print(f"\n{i}. {plan['task_title']}")
+            print(f"   Site: {plan['website_url']}")
+            print(f"   ID: {plan['task_id']}")
+            print(f"   Date: {plan['execution_date']}")
+            print(f"   Plan: {plan['plan_preview']}")
+
+
+def cmd_stats(args):
+    rag_manager = _get_rag_manager()
+    print("📊 Statistiques de la base RAG:")
+    print("=" * 50)
+    stats = rag_manager.get_plans_statistics()
+    print(f"Total plans: {stats['total_plans']}")
+    print(f"Sites web uniques: {stats['unique_websites']}")
+    if stats['websites']:
+        print("Sites:")
+        for site in stats['websites']:
+            print(f"  - {site}")
+
+
+def cmd_clear(args):
+    rag_manager = _get_rag_manager()
+    print("🗑️ Suppression de tous les plans...")
+    success = rag_manager.clear_all_plans()
+    if success:
+        print("✅ Tous les plans ont été supprimés.")
+    else:
+        print("❌ Erreur lors de la suppression.")
+
+
+def cmd_delete_website(args):
+    if not args:
+        print("❌ URL du site requise.")
+        return
+    website_url = args[0]
+    rag_manager = _get_rag_manager()
+    print(f"🗑️ Suppression des plans pour {website_url}...")
+    success = rag_manager.delete_plans_by_website(website_url)
+    if success:
+        print("✅ Plans supprimés.")
+    else:
+        print("❌ Erreur lors de la suppression.")
+
+
+def cmd_delete_task(args):
+    if not args:
+        print("❌ Titre de la tâche requis.")
+        return
+    task_title = args[0]
+    rag_manager = _get_rag_manager()
+    print(f"🗑️ Suppression des plans pour la tâche: {task_title}...")
+    success = rag_manager.delete_plans_by_task_title(task_title)
+    if success:
+        print("✅ Plans supprimés.")
+    else:
+        print("❌ Erreur lors de la suppression.")
+
+
+def cmd_test_domain(args):
+    if not args:
+        print("❌ URL requise pour le test.")
+        return
+    url = args[0]
+    
+    # Importer le NavigationGraphManager pour tester
+    from navigation_graph_manager import NavigationGraphManager
+    nav_manager = NavigationGraphManager()
+    
+    domain = nav_manager._extract_domain(url)
+    print(f"🌐 Test d'extraction de domaine:")
+    print(f"URL: {url}")
+    print(f"Domaine extrait: {domain}")
+    print(f"Nom de fichier généré: {domain}_graph.json")
+
+
+# Commandes disponibles ; chacune ne charge que ce dont elle a besoin
+COMMANDS = {
+    "list": cmd_list,
+    "stats": cmd_stats,
+    "clear": cmd_clear,
+    "delete-website": cmd_delete_website,
+    "delete-task": cmd_delete_task,
+    "test-domain": cmd_test_domain,
+}
+
 
 def main():
     """Fonction principale du gestionnaire RAG"""
     
     if len(sys.argv) < 2:
-        print("Usage: python rag_manager.py <command> [options]")
-        print("\nCommandes disponibles:")
-        print("  list                    - Lister tous les plans")
-        print("  stats                   - Afficher les statistiques")
-        print("  clear                   - Supprimer tous les plans")
-        print("  delete-website <url>    - Supprimer les plans d'un site")
-        print("  delete-task <title>     - Supprimer les plans d'une tâche")
-        print("  test-domain <url>       - Tester l'extraction de domaine")
+        print_usage()
         return
     
     command = sys.argv[1]
-    rag_manager = PlanRAGManager()
-    
-    if command == "list":
-        print("📋 Liste de tous les plans RAG:")
-        print("=" * 50)
-        plans = rag_manager.list_all_plans()
-        
-        if not plans:
-            print("Aucun plan trouvé.")
-        else:
-            for i, plan in enumerate(plans, 1):
-                print(f"\n{i}. {plan['task_title']}")
-                print(f"   Site: {plan['website_url']}")
-                print(f"   ID: {plan['task_id']}")
-                print(f"   Date: {plan['execution_date']}")
-                print(f"   Plan: {plan['plan_preview']}")
-    
-    elif command == "stats":
-        print("📊 Statistiques de la base RAG:")
-        print("=" * 50)
-        stats = rag_manager.get_plans_statistics()
-        print(f"Total plans: {stats['total_plans']}")
-        print(f"Sites web uniques: {stats['unique_websites']}")
-        if stats['websites']:
-            print("Sites:")
-            for site in stats['websites']:
-                print(f"  - {site}")
-    
-    elif command == "clear":
-        print("🗑️ Suppression de tous les plans...")
-        success = rag_manager.clear_all_plans()
-        if success:
-            print("✅ Tous les plans ont été supprimés.")
-        else:
-            print("❌ Erreur lors de la suppression.")
-    
-    elif command == "delete-website":
-        if len(sys.argv) < 3:
-            print("❌ URL du site requise.")
-            return
-        website_url = sys.argv[2]
-        print(f"🗑️ Suppression des plans pour {website_url}...")
-        success = rag_manager.delete_plans_by_website(website_url)
-        if success:
-            print("✅ Plans supprimés.")
-        else:
-            print("❌ Erreur lors de la suppression.")
-    
-    elif command == "delete-task":
-        if len(sys.argv) < 3:
-            print("❌ Titre de la tâche requis.")
-            return
-        task_title = sys.argv[2]
-        print(f"🗑️ Suppression des plans pour la tâche: {task_title}...")
-        success = rag_manager.delete_plans_by_task_title(task_title)
-        if success:
-            print("✅ Plans supprimés.")
-        else:
-            print("❌ Erreur lors de la suppression.")
-    
-    elif command == "test-domain":
-        if len(sys.argv) < 3:
-            print("❌ URL requise pour le test.")
-            return
-        url = sys.argv[2]
-        
-        # Importer le NavigationGraphManager pour tester
-        from navigation_graph_manager import NavigationGraphManager
-        nav_manager = NavigationGraphManager()
-        
-        domain = nav_manager._extract_domain(url)
-        print(f"🌐 Test d'extraction de domaine:")
-        print(f"URL: {url}")
-        print(f"Domaine extrait: {domain}")
-        print(f"Nom de fichier généré: {domain}_graph.json")
-    
-    else:
+    handler = COMMANDS.get(command)
+    if handler is None:
         print(f"❌ Commande inconnue: {command}")
         print("Utilisez 'python rag_manager.py' pour voir les commandes disponibles.")
+        return
+    
+    handler(sys.argv[2:])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
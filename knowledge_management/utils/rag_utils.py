@@ -2,54 +2,47 @@
 Utilitaires pour tester et gérer le système RAG des plans de succès.
 """
 
-import asyncio
+import argparse
 import logging
+import sys
 from pathlib import Path
-from typing import List, Dict, Any
-
-from knowledge_management.utils.plan_rag_manager import PlanRAGManager
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-
-def test_rag_system():
-    """Teste le système RAG avec des données d'exemple"""
-    
-    # Initialiser le gestionnaire RAG
-    rag_manager = PlanRAGManager()
-    
-    # Données de test
-    test_plans = [
-        {
-            "task_title": "Login and save property to wishlist",
-            "website_url": "http://airbnb.com",
-            "plan": """1. Navigate to airbnb.com
+# Données de test, construites une fois à l'import et immuables
+_TEST_PLANS = (
+    MappingProxyType({
+        "task_title": "Login and save property to wishlist",
+        "website_url": "http://airbnb.com",
+        "plan": """1. Navigate to airbnb.com
 2. Click on 'Log in' button
 3. Enter credentials: username 'soel@twin.so', password 'Agent123456!'
 4. Search for a property with 'Guest Favorite' badge
 5. Click on the property to view details
 6. Click 'Save' button to add to wishlist
 7. Verify the property appears in wishlist""",
-            "task_id": "test_001"
-        },
-        {
-            "task_title": "Remove property from wishlist",
-            "website_url": "http://airbnb.com", 
-            "plan": """1. Log in to airbnb.com
+        "task_id": "test_001"
+    }),
+    MappingProxyType({
+        "task_title": "Remove property from wishlist",
+        "website_url": "http://airbnb.com", 
+        "plan": """1. Log in to airbnb.com
 2. Navigate to 'Wishlist' section
 3. Find the previously saved property
 4. Click on the property to open details
 5. Click 'Remove from wishlist' button
 6. Confirm removal
 7. Verify property is no longer in wishlist""",
-            "task_id": "test_002"
-        },
-        {
-            "task_title": "Search and filter properties",
-            "website_url": "http://airbnb.com",
-            "plan": """1. Go to airbnb.com homepage
+        "task_id": "test_002"
+    }),
+    MappingProxyType({
+        "task_title": "Search and filter properties",
+        "website_url": "http://airbnb.com",
+        "plan": """1. Go to airbnb.com homepage
 2. Enter destination in search bar
 3. Set check-in and check-out dates
 4. Add number of guests
@@ -57,42 +50,55 @@ def test_rag_system():
 6. Use filters to narrow results (price, amenities, etc.)
 7. Sort by rating or price
 8. Browse through filtered results""",
-            "task_id": "test_003"
-        }
-    ]
+        "task_id": "test_003"
+    }),
+)
+
+_TEST_QUERIES = (
+    ("Login and manage wishlist", "http://airbnb.com"),
+    ("Search for properties", "http://airbnb.com"),
+    ("Book a property", "http://airbnb.com")
+)
+
+
+def get_plan_rag_manager():
+    """Gestionnaire RAG partagé, importé à la première commande qui en a besoin (sentence-transformers est long à charger)"""
+    from knowledge_management.utils.plan_rag_manager import get_plan_rag_manager as get_shared_manager
+    return get_shared_manager()
+
+
+def test_rag_system():
+    """Teste le système RAG avec des données d'exemple"""
+    
+    # Gestionnaire RAG partagé (modèle d'embedding et client ChromaDB chargés une fois par processus)
+    rag_manager = get_plan_rag_manager()
     
     print("🧪 Test du système RAG")
     print("=" * 50)
     
-    # Stocker les plans de test
+    # Stocker les plans de test en un seul appel (embeddings calculés en un lot, une seule insertion)
     print("\n📥 Stockage des plans de test...")
-    for plan_data in test_plans:
-        success = rag_manager.store_successful_plan(
-            plan_data["task_title"],
-            plan_data["website_url"], 
-            plan_data["plan"],
-            plan_data["task_id"]
-        )
-        print(f"  Plan '{plan_data['task_title']}': {'✅' if success else '❌'}")
+    plans_dict = {plan_data["task_title"]: plan_data["plan"] for plan_data in _TEST_PLANS}
+    success = rag_manager.store_successful_plan(plans_dict, "test_rag_system")
+    for task_title in plans_dict:
+        print(f"  Plan '{task_title}': {'✅' if success else '❌'}")
     
     # Afficher les statistiques
     print("\n📊 Statistiques:")
     stats = rag_manager.get_plans_statistics()
     print(f"  Plans stockés: {stats['total_plans']}")
-    print(f"  Sites web: {stats['unique_websites']}")
+    print(f"  Titres de tâches uniques: {stats['unique_task_titles']}")
     
     # Tester la recherche
     print("\n🔍 Test de recherche de plans similaires...")
     
-    test_queries = [
-        ("Login and manage wishlist", "http://airbnb.com"),
-        ("Search for properties", "http://airbnb.com"),
-        ("Book a property", "http://airbnb.com")
-    ]
+    # Toutes les requêtes en un seul encodage et une seule recherche ChromaDB
+    all_similar_plans = rag_manager.find_similar_plans_batch(
+        [query_title for query_title, _ in _TEST_QUERIES], top_k=2
+    )
     
-    for query_title, query_url in test_queries:
+    for (query_title, query_url), similar_plans in zip(_TEST_QUERIES, all_similar_plans):
         print(f"\n  Recherche: '{query_title}' sur {query_url}")
-        similar_plans = rag_manager.find_similar_plans(query_title, query_url, top_k=2)
         
         if similar_plans:
             for i, plan in enumerate(similar_plans, 1):
@@ -102,7 +108,7 @@ def test_rag_system():
     
     # Tester la génération de contexte
     print("\n📝 Test de génération de contexte...")
-    similar_plans = rag_manager.find_similar_plans("Login and save property", "http://airbnb.com")
+    similar_plans = rag_manager.find_similar_plans("Login and save property")
     if similar_plans:
         context = rag_manager.build_context_from_similar_plans(similar_plans)
         print("  Contexte généré:")
@@ -111,54 +117,74 @@ def test_rag_system():
     print("\n✅ Test terminé!")
 
 
+# Nombre de plans lus par requête ChromaDB lors du listage
+LIST_PAGE_SIZE = 500
+
+
+def iter_stored_plans(rag_manager, page_size: int = LIST_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Parcourt les métadonnées des plans stockés page par page, sans embeddings ni documents"""
+    offset = 0
+    while True:
+        page = rag_manager.plans_collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        metadatas = page['metadatas'] or []
+        yield from metadatas
+        if len(metadatas) < page_size:
+            return
+        offset += page_size
+
+
 def list_stored_plans():
     """Liste tous les plans stockés dans le système RAG"""
     
-    rag_manager = PlanRAGManager()
-    stats = rag_manager.get_plans_statistics()
+    rag_manager = get_plan_rag_manager()
     
     print("📚 Plans stockés dans le système RAG")
     print("=" * 50)
-    print(f"Total: {stats['total_plans']} plans")
-    print(f"Sites web: {stats['unique_websites']}")
     
-    if stats['websites']:
-        print(f"Sites: {', '.join(stats['websites'])}")
-    
-    # Récupérer tous les plans
+    # Les plans sont lus et affichés page par page : la mémoire reste bornée quelle que soit la taille de la base
     try:
-        all_plans = rag_manager.plans_collection.get()
-        if all_plans['metadatas']:
-            print(f"\n📋 Détail des plans:")
-            for i, metadata in enumerate(all_plans['metadatas'], 1):
-                print(f"  {i}. {metadata['task_title']}")
-                print(f"     Site: {metadata['website_url']}")
-                print(f"     ID: {metadata['task_id']}")
-                print(f"     Date: {metadata['execution_date']}")
-                print(f"     Plan: {metadata['plan'][:100]}...")
-                print()
+        print(f"Total: {rag_manager.plans_collection.count()} plans")
+        
+        task_titles = set()
+        # Lignes écrites en un seul appel par page plutôt qu'un print par ligne
+        lines = []
+        for i, metadata in enumerate(iter_stored_plans(rag_manager), 1):
+            if i == 1:
+                lines.append(f"\n📋 Détail des plans:")
+            task_titles.add(metadata['task_title'])
+            lines.append(f"  {i}. {metadata['task_title']}")
+            lines.append(f"     ID: {metadata['task_id']}")
+            lines.append(f"     Date: {metadata['execution_date']}")
+            lines.append(f"     Plan: {metadata['plan'][:100]}...")
+            lines.append("")
+            if i % LIST_PAGE_SIZE == 0:
+                sys.stdout.write("\n".join(lines) + "\n")
+                lines.clear()
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+        
+        print(f"Tâches: {len(task_titles)}")
     except Exception as e:
         print(f"❌ Erreur lors de la récupération des plans: {e}")
 
 
-def search_plans(query_title: str, website_url: str, top_k: int = 3):
+def search_plans(query_title: str, top_k: int = 3):
     """Recherche des plans similaires"""
     
-    rag_manager = PlanRAGManager()
+    rag_manager = get_plan_rag_manager()
     
     print(f"🔍 Recherche de plans similaires")
     print("=" * 50)
-    print(f"Requête: '{query_title}' sur {website_url}")
+    print(f"Requête: '{query_title}'")
     print(f"Nombre de résultats: {top_k}")
     print()
     
-    similar_plans = rag_manager.find_similar_plans(query_title, website_url, top_k)
+    similar_plans = rag_manager.find_similar_plans(query_title, top_k)
     
     if similar_plans:
         for i, plan in enumerate(similar_plans, 1):
             print(f"📋 Plan {i}:")
             print(f"  Titre: {plan['task_title']}")
-            print(f"  Site: {plan['website_url']}")
             print(f"  ID: {plan['task_id']}")
             print(f"  Score de similarité: {plan['similarity_score']:.3f}")
             print(f"  Date: {plan['execution_date']}")
@@ -168,25 +194,25 @@ def search_plans(query_title: str, website_url: str, top_k: int = 3):
         print("❌ Aucun plan similaire trouvé")
 
 
-if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
-        
-        if command == "test":
-            test_rag_system()
-        elif command == "list":
-            list_stored_plans()
-        elif command == "search" and len(sys.argv) >= 4:
-            query_title = sys.argv[2]
-            website_url = sys.argv[3]
-            top_k = int(sys.argv[4]) if len(sys.argv) > 4 else 3
-            search_plans(query_title, website_url, top_k)
-        else:
-            print("Usage:")
-            print("  python rag_utils.py test          # Test du système")
-            print("  python rag_utils.py list          # Lister les plans")
-            print("  python rag_utils.py search <title> <url> [top_k]  # Rechercher")
+def main():
+    parser = argparse.ArgumentParser(description="Test et gestion du système RAG des plans de succès")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("test", help="Test du système (commande par défaut)")
+    subparsers.add_parser("list", help="Lister les plans")
+    search_parser = subparsers.add_parser("search", help="Rechercher des plans similaires")
+    search_parser.add_argument("title")
+    search_parser.add_argument("top_k", nargs="?", type=int, default=3)
+    
+    # Arguments validés avant tout import du système RAG
+    args = parser.parse_args()
+    
+    if args.command == "list":
+        list_stored_plans()
+    elif args.command == "search":
+        search_plans(args.title, args.top_k)
     else:
-        test_rag_system() 
\ No newline at end of file
+        test_rag_system()
+
+
+if __name__ == "__main__":
+    main()
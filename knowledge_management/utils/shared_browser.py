@@ -0,0 +1,88 @@
+"""
+Browser sessions shared by the knowledge management scripts.
+
+By default agent runs reuse one session on the persistent user_data_dir profile, which keeps the
+cookies and logins saved there; runs then share its page and must not overlap. Opt-in, each run
+gets its own BrowserContext in one shared Chromium process (milliseconds to create, vs. seconds for
+a Chromium launch), so concurrent runs never drive the same page. Those contexts are incognito:
+they do not see the profile's cookies and logins.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from browser_use.browser import BrowserProfile, BrowserSession
+from browser_use.browser.types import async_playwright
+
+_playwright = None
+_shared_browser = None
+_shared_browser_lock = asyncio.Lock()
+
+# Persistent-profile session reused by every run that does not ask for an isolated context
+_profile_browser_session: Optional[BrowserSession] = None
+
+
+async def get_shared_browser(browser_profile: BrowserProfile):
+    """Launch the shared browser on first use (with the launch options of browser_profile) and return it"""
+    global _playwright, _shared_browser
+    async with _shared_browser_lock:
+        if _shared_browser is None or not _shared_browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _shared_browser = await _playwright.chromium.launch(
+                **browser_profile.kwargs_for_launch().model_dump(mode='json')
+            )
+    return _shared_browser
+
+
+@asynccontextmanager
+async def isolated_browser_session(browser_profile: BrowserProfile) -> AsyncIterator[BrowserSession]:
+    """
+    Yield a BrowserSession running in a new BrowserContext of the shared browser
+
+    The context is closed on exit (including cancellation), the shared browser stays open.
+    """
+    browser = await get_shared_browser(browser_profile)
+    browser_context = await browser.new_context(**browser_profile.kwargs_for_new_context().model_dump(mode='json'))
+    try:
+        yield BrowserSession(
+            browser_profile=browser_profile,
+            browser=browser,
+            browser_context=browser_context,
+            keep_alive=True,  # the shared browser must outlive the agent
+        )
+    finally:
+        await browser_context.close()
+
+
+def get_profile_browser_session(browser_profile: BrowserProfile) -> BrowserSession:
+    """Session on the persistent profile of browser_profile, created on first use and kept alive between runs"""
+    global _profile_browser_session
+    if _profile_browser_session is None:
+        _profile_browser_session = BrowserSession(browser_profile=browser_profile, keep_alive=True)
+    return _profile_browser_session
+
+
+@asynccontextmanager
+async def run_browser_session(browser_profile: BrowserProfile, isolated: bool) -> AsyncIterator[BrowserSession]:
+    """Yield the session an agent run uses: its own incognito context if isolated, the persistent-profile session otherwise"""
+    if isolated:
+        async with isolated_browser_session(browser_profile) as browser_session:
+            yield browser_session
+    else:
+        yield get_profile_browser_session(browser_profile)
+
+
+async def close_shared_browser():
+    """Close the persistent-profile session and the shared browser, and stop playwright"""
+    global _playwright, _shared_browser, _profile_browser_session
+    if _profile_browser_session is not None:
+        await _profile_browser_session.kill()
+        _profile_browser_session = None
+    if _shared_browser is not None:
+        await _shared_browser.close()
+        _shared_browser = None
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
@@ -0,0 +1,31 @@
+"""Tests for passing a caller-owned httpx client to ChatAnthropic."""
+
+import httpx
+
+from browser_use.llm import ChatAnthropic
+
+
+class TestAnthropicHttpClient:
+	"""Test that ChatAnthropic hands its http_client to the AsyncAnthropic client."""
+
+	async def test_http_client_is_passed_to_async_anthropic(self):
+		"""Test that the AsyncAnthropic client sends its requests through the given httpx client."""
+		http_client = httpx.AsyncClient()
+		try:
+			llm = ChatAnthropic(model='claude-sonnet-4-20250514', api_key='test-key', http_client=http_client)
+
+			assert llm._get_client_params()['http_client'] is http_client
+			assert llm.get_client()._client is http_client
+		finally:
+			await http_client.aclose()
+
+	async def test_default_client_without_http_client(self):
+		"""Test that without http_client, AsyncAnthropic builds its own httpx client."""
+		llm = ChatAnthropic(model='claude-sonnet-4-20250514', api_key='test-key')
+
+		assert 'http_client' not in llm._get_client_params()
+		client = llm.get_client()
+		try:
+			assert isinstance(client._client, httpx.AsyncClient)
+		finally:
+			await client.close()